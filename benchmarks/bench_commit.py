@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark a trf commit, one completion recorded for one tracker, against
+the number of trackers, e.g.
+
+    python benchmarks/bench_commit.py 100 1000 10000 50000
+
+For each count a FileStorage in a temporary directory is given that many
+trackers, and the bytes appended to trf.fs and the time taken are averaged
+over --commits commits. With --dict the trackers are kept in a plain dict
+in the root record, as they were before the IOBTree, and the dict is
+reassigned before each commit as save_data then did.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import trf  # noqa: E402
+
+START = datetime(2024, 1, 1)
+
+
+def open_manager(path: str, count: int, plain: bool):
+    trf.tracker_manager = manager = trf.TrackerManager(*trf.init_db(path))
+    with manager.batch():
+        for doc_id in range(1, count + 1):
+            tracker = trf.Tracker(f"tracker {doc_id}", doc_id)
+            tracker.record_completion((START, timedelta(0)))
+            manager.trackers[doc_id] = tracker
+        manager.root['next_id'] = count + 1
+    if plain:
+        manager.root['trackers'] = manager.trackers = dict(manager.trackers)
+        manager.transaction.commit()
+    return manager
+
+
+def measure(count: int, commits: int, plain: bool) -> tuple:
+    """Return the average (bytes, seconds) of a commit with count trackers."""
+    with tempfile.TemporaryDirectory() as home:
+        path = os.path.join(home, 'trf.fs')
+        manager = open_manager(path, count, plain)
+        written = elapsed = 0
+        for i in range(commits):
+            tracker = manager.trackers[1 + i * count // commits]
+            size = os.path.getsize(path)
+            started = time.perf_counter()
+            tracker.record_completion((START + timedelta(days=i + 1), timedelta(0)))
+            if plain:
+                manager.root['trackers'] = manager.trackers
+                manager.transaction.commit()
+            else:
+                manager.save_data()
+            elapsed += time.perf_counter() - started
+            written += os.path.getsize(path) - size
+        manager.close()
+    return written / commits, elapsed / commits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('counts', nargs='*', type=int, default=[100, 1000, 10000])
+    parser.add_argument('--commits', type=int, default=20)
+    parser.add_argument('--dict', action='store_true', help='the old plain dict layout')
+    args = parser.parse_args()
+    print(f"{'trackers':>9} {'bytes':>11} {'ms':>8}")
+    for count in args.counts:
+        written, elapsed = measure(count, args.commits, args.dict)
+        print(f"{count:>9,} {written:>11,.0f} {1000 * elapsed:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
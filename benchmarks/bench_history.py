@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark Tracker.record_completion, and the info then read for the list,
+against the length of the history, e.g.
+
+    python benchmarks/bench_history.py 12 100 1000 5000
+
+For each size the max_history setting is set to it, a tracker is given a
+history of that many completions and --appends more, each the latest, are
+recorded, so that the oldest is archived as the newest is added. The
+database is an in-memory MappingStorage and nothing is committed.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import trf  # noqa: E402
+from modules.storage import StorageSpec  # noqa: E402
+
+START = datetime(2000, 1, 1)
+
+
+def completions(count: int, rng: random.Random):
+    """Yield count completions about a week apart, oldest first."""
+    dt = START
+    for _ in range(count):
+        dt += timedelta(days=7, hours=rng.randint(-36, 36))
+        yield (dt, timedelta(0))
+
+
+def measure(size: int, appends: int, rng: random.Random) -> float:
+    """Return the average seconds for a completion with size in the history."""
+    manager = trf.tracker_manager
+    manager.settings['max_history'] = size
+    tracker = trf.Tracker(f"history {size}", size)
+    history = list(completions(size + appends, rng))
+    tracker.record_completions(history[:size])
+    tracker.info
+    started = time.perf_counter()
+    for completion in history[size:]:
+        tracker.record_completion(completion)
+        tracker.info
+    return (time.perf_counter() - started) / appends
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('sizes', nargs='*', type=int, default=[12, 100, 1000, 5000])
+    parser.add_argument('--appends', type=int, default=200)
+    args = parser.parse_args()
+    trf.tracker_manager = trf.TrackerManager(
+        *trf.init_db(None, StorageSpec('memory://', None))
+    )
+    rng = random.Random(0)
+    print(f"{'history':>8} {'µs':>8}")
+    for size in args.sizes:
+        print(f"{size:>8,} {1e6 * measure(size, args.appends, rng):>8.0f}")
+    trf.tracker_manager.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,32 +1,36 @@
 #!/usr/bin/env python3
-from modules.controller import Controller
-from modules.view_textual import TextualView
-from modules.common import log_msg
-from modules.make_examples import make_examples
 import os
 import sys
 import json
-from datetime import datetime, date, timedelta
+
+# Only the standard library is imported here so that the headless subcommands
+# in modules.cli start without loading Textual, Rich or prompt_toolkit.
 
 CONFIG_FILE = os.path.expanduser("~/.goalmate_config")
 
 pos_to_id = {}
 
 
-def process_arguments() -> tuple:
+def get_goalmate_home() -> str:
     """
-    Process sys.argv to get the necessary parameters, like the database file location.
+    Return the goalmate home directory from the config file, the GOALMATEHOME
+    environment variable or the default ~/.goalmate_home/.
     """
     if os.path.exists(CONFIG_FILE):
         with open(CONFIG_FILE, "r") as f:
-            goalmate_home = json.load(f).get("GOALMATEHOME")
-    else:
-        envhome = os.environ.get("GOALMATEHOME")
-        if envhome:
-            goalmate_home = envhome
-        else:
-            userhome = os.path.expanduser("~")
-            goalmate_home = os.path.join(userhome, ".goalmate_home/")
+            return json.load(f).get("GOALMATEHOME")
+    envhome = os.environ.get("GOALMATEHOME")
+    if envhome:
+        return envhome
+    userhome = os.path.expanduser("~")
+    return os.path.join(userhome, ".goalmate_home/")
+
+
+def process_arguments() -> tuple:
+    """
+    Process sys.argv to get the necessary parameters, like the database file location.
+    """
+    goalmate_home = get_goalmate_home()
 
     reset = False
     if sys.argv[1:]:
@@ -44,11 +48,6 @@ def process_arguments() -> tuple:
     return goalmate_home, db_path, reset
 
 
-# Get command-line arguments: Process the command-line arguments to get the database file location
-# goalmate_home, backup_dir, log_dir, db_path, reset = process_arguments()
-goalmate_home, db_path, reset = process_arguments()
-
-
 # def make_examples(controller):
 #     today = date.today()
 #     # start 2 weeks ago and add a goal every other day
@@ -68,9 +67,30 @@ goalmate_home, db_path, reset = process_arguments()
 
 
 def main():
+    if sys.argv[1:] and sys.argv[1] in (
+        "add",
+        "complete",
+        "list",
+        "show",
+        "export",
+        "import",
+        "from-trf",
+    ):
+        from modules.cli import run
+
+        sys.exit(run(sys.argv[1:], get_goalmate_home()))
+
+    # Get command-line arguments: Process the command-line arguments to get the database file location
+    goalmate_home, db_path, reset = process_arguments()
+
+    from modules.controller import Controller
+    from modules.view_textual import TextualView
+
     print(f"Using database: {db_path}, reset: {reset}")
     controller = Controller(db_path, reset=reset)
     if reset:
+        from modules.make_examples import make_examples
+
         make_examples(controller)
         # id = controller.add_goal("one of three minus two 3/7d -2")
         # log_msg(f"goal id: {id}")
@@ -28,8 +28,7 @@ def process_arguments():
 
     restore = len(sys.argv) > 2 and sys.argv[2] == 'restore'
 
-    return trf_home, log_level, restore, backup_dir, db_path
-
-# Get command-line arguments: Process the command-line arguments to get the database file location
-trf_home, log_level, restore, backup_dir, db_path = process_arguments()
+    # the storage, by default FileStorage on db_path, see storage.py
+    storage_uri = os.environ.get('TRFSTORAGE') or 'file://'
 
+    return trf_home, log_level, restore, backup_dir, db_path, storage_uri
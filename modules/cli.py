@@ -0,0 +1,255 @@
+"""
+Headless goalmate subcommands for scripts and cron jobs, e.g.
+
+    goals.py add "exercise 3/7d -1"
+    goals.py complete exercise "yesterday 5p"
+    goals.py list --json
+    goals.py show 3 --json
+    goals.py export goals.ndjson
+    goals.py import --format csv < log.csv
+    goals.py from-trf ~/trf/trf.fs
+
+Only argparse, json, sqlite3 and the goalmate model and controller are
+imported, so a subcommand starts without loading Textual or Rich.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+from modules.controller import Controller
+from modules.common import seconds_to_time
+from modules import common, transfer
+
+
+# the columns of the rows returned by list_goals and show_goal
+GOAL_COLUMNS = ("goal_id", "name", "time", "goal", "warn", "created")
+LIST_COLUMNS = GOAL_COLUMNS + ("done", "modified")
+SHOW_COLUMNS = GOAL_COLUMNS + ("modified", "done")
+
+
+def goal_fields(record, columns=SHOW_COLUMNS) -> dict:
+    """
+    Map a goal row from list_goals or show_goal, with the matching columns,
+    to a dict for --json with the same keys for both.
+    """
+    row = dict(zip(columns, record))
+    return {
+        "goal_id": row["goal_id"],
+        "name": row["name"],
+        "goal": row["goal"],
+        "time": row["time"],
+        "period": seconds_to_time(row["time"]),
+        "warn": row["warn"],
+        "done": row["done"],
+        "created": row["created"],
+        "modified": row["modified"],
+    }
+
+
+def find_goal(controller: Controller, goal: str):
+    """Return the goal_id for goal, either an integer id or an exact name."""
+    if goal.isdigit() and controller.db_manager.show_goal(int(goal)):
+        return int(goal)
+    return controller.db_manager.get_goal_id(goal)
+
+
+def do_add(controller: Controller, args) -> int:
+    try:
+        goal_id = controller.add_goal(args.goal)
+    except sqlite3.IntegrityError:
+        print(f"A goal with this name already exists: {args.goal}", file=sys.stderr)
+        return 1
+    if goal_id is None:
+        print(
+            "Invalid. Expected: 'goal name X/Yz [W]' where W is optional.",
+            file=sys.stderr,
+        )
+        return 1
+    print(json.dumps({"goal_id": goal_id}) if args.json else goal_id)
+    return 0
+
+
+def do_complete(controller: Controller, args) -> int:
+    goal_id = find_goal(controller, args.goal)
+    if goal_id is None:
+        print(f"No goal found for '{args.goal}'.", file=sys.stderr)
+        return 1
+    when = args.when or round(datetime.now().timestamp())
+    try:
+        controller.record_completion(goal_id, when)
+    except (ValueError, OverflowError) as e:
+        print(f"Invalid datetime '{args.when}': {e}", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(goal_fields(controller.db_manager.show_goal(goal_id))))
+    return 0
+
+
+def do_list(controller: Controller, args) -> int:
+    goals = controller.db_manager.list_goals()
+    if args.json:
+        print(json.dumps([goal_fields(record, LIST_COLUMNS) for record in goals]))
+        return 0
+    for record in goals:
+        fields = goal_fields(record, LIST_COLUMNS)
+        print(
+            f"{fields['goal_id']}\t{fields['name']}\t{fields['done']}\t"
+            f"{fields['goal']}/{fields['period']}\t{fields['warn']:+}"
+        )
+    return 0
+
+
+def do_show(controller: Controller, args) -> int:
+    goal_id = find_goal(controller, args.goal)
+    if goal_id is None:
+        print(f"No goal found for '{args.goal}'.", file=sys.stderr)
+        return 1
+    fields = goal_fields(controller.db_manager.show_goal(goal_id))
+    completions = controller.db_manager.list_completions(goal_id)
+    if args.json:
+        fields["completions"] = [
+            {"completion_id": completion_id, "completion": completion}
+            for completion_id, completion in completions
+        ]
+        print(json.dumps(fields))
+        return 0
+    for key, value in fields.items():
+        print(f"{key}: {value}")
+    print(f"completions: {len(completions)}")
+    for _, completion in completions:
+        print(f"  {datetime.fromtimestamp(abs(completion)).strftime('%y-%m-%d %H:%M')}")
+    return 0
+
+
+def do_export(controller: Controller, args) -> int:
+    fmt = transfer.format_for(args.file, args.format)
+    out = sys.stdout if args.file == "-" else open(args.file, "w", newline="")
+    try:
+        records = transfer.export_records(controller.db_manager)
+        written = transfer.WRITERS[fmt](records, out)
+        for _ in transfer.count(written, transfer.Progress("exported")):
+            pass
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+def do_import(controller: Controller, args) -> int:
+    fmt = transfer.format_for(args.file, args.format)
+    source = sys.stdin if args.file == "-" else open(args.file, newline="")
+    progress = transfer.Progress("imported")
+    try:
+        records = transfer.import_records(transfer.READERS[fmt](source))
+        goals, completions, merged = controller.db_manager.bulk_import(
+            records, batch_size=args.batch_size, progress=progress
+        )
+    except (ValueError, sqlite3.Error) as e:
+        print(f"Import failed, nothing was imported: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    progress.done(goals, completions, merged)
+    return 0
+
+
+def do_from_trf(controller: Controller, args) -> int:
+    # ZODB is only needed here
+    from modules.from_trf import convert
+
+    progress = transfer.Progress("copied")
+    try:
+        goals, completions, merged = convert(args.trf, controller.db_manager, progress)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Conversion failed, nothing was imported: {e}", file=sys.stderr)
+        return 1
+    progress.done(goals, completions, merged)
+    return 0
+
+
+def make_parser(goalmate_home: str) -> argparse.ArgumentParser:
+    # options shared by every subcommand so they can follow its name
+    database = argparse.ArgumentParser(add_help=False)
+    database.add_argument(
+        "--db",
+        default=os.path.join(goalmate_home, "goalmate.db"),
+        help="the goalmate database file (default: %(default)s)",
+    )
+    common = argparse.ArgumentParser(add_help=False, parents=[database])
+    common.add_argument("--json", action="store_true", help="print JSON")
+    formats = argparse.ArgumentParser(add_help=False, parents=[database])
+    formats.add_argument(
+        "--format",
+        choices=sorted(transfer.WRITERS),
+        help="default: csv for a .csv file, otherwise ndjson",
+    )
+
+    parser = argparse.ArgumentParser(prog="goalmate")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser(
+        "add", parents=[common], help="add a goal, e.g. 'exercise 3/7d -1'"
+    )
+    add.add_argument("goal", help="name X/Yz [W]")
+    add.set_defaults(func=do_add)
+
+    complete = commands.add_parser(
+        "complete", parents=[common], help="record a completion"
+    )
+    complete.add_argument("goal", help="goal id or name")
+    complete.add_argument("when", nargs="?", help="datetime (default: now)")
+    complete.set_defaults(func=do_complete)
+
+    list_ = commands.add_parser("list", parents=[common], help="list the goals")
+    list_.set_defaults(func=do_list)
+
+    show = commands.add_parser(
+        "show", parents=[common], help="show a goal and its completions"
+    )
+    show.add_argument("goal", help="goal id or name")
+    show.set_defaults(func=do_show)
+
+    export = commands.add_parser(
+        "export", parents=[formats], help="export goals and completions"
+    )
+    export.add_argument("file", nargs="?", default="-", help="default: stdout")
+    export.set_defaults(func=do_export)
+
+    import_ = commands.add_parser(
+        "import", parents=[formats], help="import goals and completions"
+    )
+    import_.add_argument("file", nargs="?", default="-", help="default: stdin")
+    import_.add_argument(
+        "--batch-size",
+        type=int,
+        default=10000,
+        help="completions per insert batch (default: %(default)s)",
+    )
+    import_.set_defaults(func=do_import)
+
+    from_trf = commands.add_parser(
+        "from-trf", parents=[database], help="copy the trackers from a trf database"
+    )
+    from_trf.add_argument("trf", help="the trf.fs file storage")
+    from_trf.set_defaults(func=do_from_trf)
+    return parser
+
+
+def run(argv: list, goalmate_home: str) -> int:
+    """Parse argv, run the subcommand and return the exit status."""
+    args = make_parser(goalmate_home).parse_args(argv)
+    # a script may run this thousands of times a day in any directory, so
+    # no log_msg.md is written there
+    common.LOG_FILE = None
+    db_dir = os.path.dirname(os.path.abspath(args.db))
+    os.makedirs(db_dir, exist_ok=True)
+    controller = Controller(args.db)
+    try:
+        return args.func(controller, args)
+    finally:
+        controller.db_manager.close()
@@ -1,16 +1,15 @@
 import inspect
-from datetime import datetime
-from dateutil.parser import parse as du_parse
-from dateutil.parser import parserinfo
-from dateutil.tz import gettz
+from datetime import datetime, timedelta
 import textwrap
 import shutil
-from rich.markdown import Markdown
-from rich.console import Console
 import os
 import re
 
+# dateutil and rich are imported where they are used so that the headless
+# subcommands in modules.cli only pay for them when they need them.
+
 ELLIPSIS_CHAR = "…"
+SPARK_CHARS = " ▁▂▃▄▅▆▇█"
 
 COLORS = {
     0: "#4682b4",  # steelblue
@@ -24,9 +23,28 @@ COLORS = {
 }
 
 
+# days relative to today that may begin a datetime string, e.g. "yesterday 5p"
+RELATIVE_DAYS = {"yesterday": -1, "today": 0, "tomorrow": 1}
+
+# where log_msg writes, relative to the current directory. None turns it
+# off, as the headless subcommands in modules.cli do.
+LOG_FILE = "log_msg.md"
+
+
 def parse(input_str: str) -> datetime:
-    """parse string using dateutil.parser.parse and parserinfo"""
+    """
+    parse string using dateutil.parser.parse and parserinfo, with the date
+    taken from a leading "yesterday", "today" or "tomorrow" if there is one
+    """
+    from dateutil.parser import parse as du_parse
+    from dateutil.parser import parserinfo
+
     info = parserinfo(dayfirst=False, yearfirst=True)
+    first, _, rest = input_str.strip().partition(" ")
+    if first.lower() in RELATIVE_DAYS:
+        day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        day += timedelta(days=RELATIVE_DAYS[first.lower()])
+        return du_parse(rest, parserinfo=info, default=day) if rest.strip() else day
     return du_parse(input_str.strip(), parserinfo=info)
 
 
@@ -143,6 +161,8 @@ def seconds_to_datetime(seconds: int) -> datetime:
     Returns:
         datetime: The corresponding datetime object.
     """
+    from dateutil.tz import gettz
+
     if seconds >= 0:
         # Aware datetime: UTC to local time
         dt_utc = datetime.fromtimestamp(seconds, tz=gettz("UTC"))
@@ -167,6 +187,8 @@ def datetime_to_seconds(input_str: str) -> int:
     Returns:
         int: Positive seconds for aware (with timezone), negative for naive (zNaive).
     """
+    from dateutil.tz import gettz
+
     if "z" in input_str:
         datetime_part, timezone_part = input_str.split("z", 1)
     else:
@@ -207,17 +229,39 @@ def truncate_string(s: str, max_length: int) -> str:
         return s
 
 
-def log_msg(msg: str, file_path: str = "log_msg.md"):
+def sparkline(counts: list, target: int) -> str:
+    """
+    Render completion counts, oldest first, as a string of block characters
+    whose heights show each count as a fraction of the target.
+
+    >>> sparkline([0, 1, 2, 3, 4], 3)
+    ' ▃▅██'
+    """
+    if target <= 0:
+        # no target: any completion fills the block
+        target = 1
+    top = len(SPARK_CHARS) - 1
+    return "".join(
+        SPARK_CHARS[min(top, round(top * count / target))] for count in counts
+    )
+
+
+def log_msg(msg: str, file_path: str = None):
     """
     Log a message and save it directly to a specified file.
 
     Args:
         msg (str): The message to log.
-        file_path (str, optional): Path to the log file. Defaults to "log_msg.txt".
+        file_path (str, optional): Path to the log file. Defaults to LOG_FILE,
+            and nothing is written if that is None.
     """
-    stack = inspect.stack()[1]
-    caller_name = stack.function  # Function name
-    caller_basename = os.path.basename(stack.filename)  # File name (without full path)
+    file_path = file_path or LOG_FILE
+    if file_path is None:
+        return
+    # inspect.stack() would read the source of every frame - only the caller is needed
+    caller = inspect.currentframe().f_back.f_code
+    caller_name = caller.co_name  # Function name
+    caller_basename = os.path.basename(caller.co_filename)  # File name (without full path)
     caller_file = os.path.splitext(caller_basename)[0]
 
     lines = [
@@ -249,6 +293,9 @@ def display_messages(file_path: str = "log_msg.md"):
     Args:
         file_path (str, optional): Path to the log file. Defaults to "log_msg.txt".
     """
+    from rich.markdown import Markdown
+    from rich.console import Console
+
     try:
         # Read messages from the file
         with open(file_path, "r") as f:
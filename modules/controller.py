@@ -1,7 +1,5 @@
 from modules.model import DatabaseManager
-from rich.table import Table
-from rich.box import HEAVY_EDGE
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from .common import (
     fmt_dt,
     log_msg,
@@ -12,6 +10,7 @@ from .common import (
     truncate_string,
     COLORS,
     parse_goal_string,
+    sparkline,
 )
 
 
@@ -77,6 +76,7 @@ class Controller:
         self.tag_to_id = {}
         self.goal_names = []
         self.afill = 1
+        self.spark_windows = 8  # number of recent periods in the sparkline
 
     def is_goal_unique(self, name: str):
         return name not in self.goal_names
@@ -85,25 +85,27 @@ class Controller:
         # row_color = COLORS[2]
 
         goals = self.db_manager.list_goals()
-        log_msg(f"got {goals = }")
+        log_msg(f"got {len(goals)} goals")
         self.afill = 1 if len(goals) < 26 else 2 if len(goals) < 676 else 3
         if not goals:
             return [
                 "No goals found.",
             ]
 
+        # counts for the last spark_windows periods of every goal, newest first
+        windows = {}
+        for goal_id, window, count in self.db_manager.list_goal_windows(
+            self.spark_windows
+        ):
+            counts = windows.setdefault(goal_id, [0] * self.spark_windows)
+            if 0 <= window < self.spark_windows:
+                counts[window] = count
+
         # 2*2 + 3*1 + 3 + 6*4 = 34 => name width = width - 34
-        name_width = width - 30
-        table = Table(title="goals", expand=True, box=HEAVY_EDGE)
-        table.add_column("row", justify="center", width=3, style="dim")
-        table.add_column("name", width=name_width, overflow="ellipsis", no_wrap=True)
-        table.add_column("done", justify="center", width=6)
-        table.add_column("target", justify="right", width=6)
-        table.add_column("period", justify="left", width=6)
-        table.add_column("warn", justify="center", width=6)
+        name_width = width - 31 - self.spark_windows
 
         results = [
-            f"{'row':^3}  {'name':<{name_width}} {'done':^5} {'goal':>5}/{'time':<5} {'warn':^6}",
+            f"{'row':^3}  {'name':<{name_width}} {'done':^5} {'goal':>5}/{'time':<5} {'warn':^6} {'recent':<{self.spark_windows}}",
         ]
 
         # goal_id: 0,  name: 1, time (period): 2, goal (target): 3, warn: 4, created: 5,
@@ -115,7 +117,6 @@ class Controller:
             self.tag_to_id[tag] = goal[0]
             name = truncate_string(goal[1], name_width)
             time = seconds_to_time(goal[2]) if isinstance(goal[2], int) else goal[2]
-            log_msg(f"{goal[2] = }, {time = }")
             warn = goal[4]
             done = goal[6]
             if warn > 0 and done > goal[3] + warn:
@@ -125,6 +126,10 @@ class Controller:
             else:
                 row_color = COLORS[2]
             warning = f"{warn:+}" if warn else " "
+            # oldest period on the left, current period on the right
+            recent = sparkline(
+                windows.get(goal[0], [0] * self.spark_windows)[::-1], goal[3]
+            )
 
             row = " ".join(
                 [
@@ -135,6 +140,7 @@ class Controller:
                     f"[{row_color}]{' '}[/{row_color}]",
                     f"[{row_color}]{time:<4}[/{row_color}]",
                     f"[{row_color}]{warning:^6}[/{row_color}]",
+                    f"[{row_color}]{recent}[/{row_color}]",
                 ]
             )
             results.append(row)
@@ -241,10 +247,6 @@ class Controller:
         log_msg(f"{completions = }")
 
         self.afill = 1 if len(completions) < 26 else 2 if len(completions) < 676 else 3
-        table = Table(title="completions", expand=True, box=HEAVY_EDGE)
-        table.add_column("row", justify="center", width=3, style="dim")
-        table.add_column("completion", no_wrap=True)
-
         results = [
             "[bold #87cefa]Completions[/bold #87cefa]:",
         ]
@@ -269,6 +271,44 @@ class Controller:
 
         return results, tag_to_idx
 
+    def heatmap(self, goal_id: int | None = None, weeks: int = 53):
+        """
+        Lay out the daily completions of goal_id, or of all goals if goal_id
+        is None, for the last weeks weeks as a calendar grid.
+
+        Returns (title, months, levels, total) where levels[weekday][week]
+        is None for days after today and otherwise an intensity from 0 to 4,
+        months[week] is the month abbreviation for a week in which a month
+        begins and "" otherwise, and total is the number of completions shown.
+        """
+        today = date.today()
+        # weeks run Monday to Sunday with the current week in the last column
+        start = today - timedelta(days=today.weekday() + 7 * (weeks - 1))
+        counts = dict(self.db_manager.daily_counts(start.isoformat(), goal_id))
+        most = max(counts.values(), default=0)
+        total = sum(counts.values())
+
+        levels = [[None] * weeks for _ in range(7)]
+        months = [""] * weeks
+        day = start
+        for week in range(weeks):
+            for weekday in range(7):
+                if day.day == 1 or (week == 0 and weekday == 0):
+                    months[week] = day.strftime("%b")
+                if day <= today:
+                    count = counts.get(day.isoformat(), 0)
+                    # 1 to 4 for any completions, scaled to the busiest day
+                    levels[weekday][week] = -(-4 * count // most) if count else 0
+                day += timedelta(days=1)
+
+        if goal_id is None:
+            name = "all goals"
+        else:
+            record = self.db_manager.show_goal(goal_id)
+            name = record[1] if record else f"goal {goal_id}"
+        title = f"{name}: {total} completions since {start.strftime('%b')} {start.day}, {start.year}"
+        return title, months, levels, total
+
     def record_completion(
         self,
         goal_id,
@@ -0,0 +1,169 @@
+"""
+Copy the trackers in a trf ZODB file storage, trf.fs, into a goalmate
+database as goals with their completions, e.g.
+
+    goals.py from-trf ~/trf/trf.fs
+
+Each tracker becomes a goal with a target of one completion per period,
+where the period is the tracker's average interval between completions, and
+each (datetime, timedelta) in its history, archived completions included,
+becomes a completion at datetime.
+
+Copying again adds only the completions recorded since: the goal copied
+from a tracker is recognised by its name and the tracker's created time,
+which it keeps, and the completions it already has are skipped.
+
+trf.fs is opened read-only and trf itself is never imported: Tracker records
+are unpickled as TrackerRecord instances and turned back into ghosts as soon
+as they have been read, so memory use does not grow with the number of
+trackers.
+"""
+
+from datetime import datetime, timedelta
+from itertools import chain, count
+
+import ZODB
+import ZODB.broken
+import ZODB.FileStorage
+from persistent import Persistent
+
+from modules.history import decode_history
+
+DEFAULT_PERIOD = timedelta(days=7)  # for trackers with fewer than two completions
+
+
+class TrackerRecord(Persistent):
+    """Holds the state of a trf Tracker without any of its behavior."""
+
+    history = ()
+    archive = None
+    created = None
+    modified = None
+
+    def __setstate__(self, state):
+        if isinstance(state.get("history"), bytes):
+            state["history"] = decode_history(state["history"])
+        super().__setstate__(state)
+
+
+class TrfDB(ZODB.DB):
+    """
+    A DB that unpickles Tracker as TrackerRecord. This has to be a method
+    rather than an attribute set after the DB is created since the DB opens,
+    and pools, a connection in its constructor.
+    """
+
+    def classFactory(self, connection, modulename, globalname):
+        if globalname == "Tracker":
+            return TrackerRecord
+        return ZODB.broken.find_global(modulename, globalname)
+
+
+def average_period(history) -> int:
+    """
+    Return the average interval of a trf history in seconds, computed as trf
+    does from the adjusted intervals dt[i+1] + td[i+1] - dt[i], and rounded
+    to whole days, hours or minutes depending on its size.
+    """
+    if len(history) < 2:
+        period = DEFAULT_PERIOD
+    else:
+        total = sum(
+            (history[i + 1][0] + history[i + 1][1] - history[i][0]
+             for i in range(len(history) - 1)),
+            timedelta(),
+        )
+        period = total / (len(history) - 1)
+    seconds = period.total_seconds()
+    for unit in (24 * 60 * 60, 60 * 60, 60):
+        if seconds >= unit:
+            return round(seconds / unit) * unit
+    return 60
+
+
+def timestamp(dt) -> int:
+    return round(dt.timestamp()) if isinstance(dt, datetime) else 0
+
+
+def goal_for(db_manager, tracker, doc_id: int, names: set):
+    """
+    Return (name, goal_id) for the goal of tracker, where goal_id is that
+    of the goal an earlier copy made from it, with the same name and
+    created time, or None for a new goal. The tracker's name is used
+    unless another goal or an earlier tracker has it, then the name with
+    the doc_id appended and then with a counter as well.
+    """
+    created = timestamp(tracker.created)
+    candidates = chain(
+        (tracker.name, f"{tracker.name} ({doc_id})"),
+        (f"{tracker.name} ({doc_id}.{n})" for n in count(2)),
+    )
+    for name in candidates:
+        if name in names:
+            continue
+        goal_id = db_manager.get_goal_id(name)
+        if goal_id is None:
+            return name, None
+        if db_manager.show_goal(goal_id)[5] == created:
+            return name, goal_id
+
+
+def open_trf(path: str, cache_size: int = 1000):
+    """Open the trf file storage at path read-only and return (db, connection)."""
+    storage = ZODB.FileStorage.FileStorage(path, read_only=True)
+    db = TrfDB(storage, cache_size=cache_size)
+    return db, db.open()
+
+
+def trf_records(connection, db_manager, minimize_every: int = 1000):
+    """
+    Yield DatabaseManager.bulk_import records for every tracker, a goal
+    record followed by its completions, or only the completions it does
+    not have yet if the goal was copied from the tracker before. The name
+    of the goal is chosen by goal_for.
+    """
+    trackers = connection.root().get("trackers", {})
+    names = set()
+    for num, (doc_id, tracker) in enumerate(trackers.items(), start=1):
+        name, goal_id = goal_for(db_manager, tracker, doc_id, names)
+        names.add(name)
+        history = list(tracker.history)
+        if tracker.archive is not None:
+            history += tracker.archive.items()
+        history.sort(key=lambda x: x[0])
+        copied = set()
+        if goal_id is None:
+            yield (
+                "goal",
+                name,
+                average_period(history),
+                1,
+                0,
+                timestamp(tracker.created),
+                timestamp(tracker.modified),
+            )
+        else:
+            copied = {completion for _, completion in db_manager.list_completions(goal_id)}
+        for dt, _ in history:
+            if timestamp(dt) not in copied:
+                yield ("completion", name, timestamp(dt))
+        if tracker.archive is not None:
+            tracker.archive._p_deactivate()
+        tracker._p_deactivate()
+        if not num % minimize_every:
+            connection.cacheMinimize()
+
+
+def convert(path: str, db_manager, progress=None):
+    """
+    Copy every tracker in the trf storage at path. Returns (goals,
+    completions, merged) as DatabaseManager.bulk_import does.
+    """
+    db, connection = open_trf(path)
+    try:
+        return db_manager.bulk_import(
+            trf_records(connection, db_manager), progress=progress
+        )
+    finally:
+        connection.close()
+        db.close()
@@ -0,0 +1,57 @@
+"""
+A compact encoding of a trf Tracker history, a list of (datetime, timedelta)
+pairs, for its ZODB pickle.
+
+Pickled as objects, every datetime and timedelta carries a class reference
+and a constructor call. Encoded, a history is a version byte followed by an
+int64 array of the datetimes, as microseconds since 1970-01-01, and an int32
+array of the timedeltas, as seconds, both little-endian: 12 bytes per entry.
+The datetimes are naive, so this is exact and involves no timezone.
+"""
+
+import sys
+from array import array
+from datetime import datetime, timedelta
+from typing import Optional
+
+VERSION = 1
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+ONE_SECOND = timedelta(seconds=1)
+
+
+def encode_history(history) -> Optional[bytes]:
+    """
+    Return the encoded history or None if it cannot be encoded exactly,
+    e.g., for an aware datetime or a timedelta with a fraction of a second.
+    """
+    moments = array('q')
+    adjustments = array('i')
+    try:
+        for dt, td in history:
+            if dt.tzinfo is not None or td % ONE_SECOND:
+                return None
+            moments.append((dt - EPOCH) // ONE_MICROSECOND)
+            adjustments.append(td // ONE_SECOND)
+    except (OverflowError, TypeError, ValueError):
+        return None
+    if sys.byteorder == 'big':
+        moments.byteswap()
+        adjustments.byteswap()
+    return bytes([VERSION]) + moments.tobytes() + adjustments.tobytes()
+
+
+def decode_history(data: bytes) -> list[tuple[datetime, timedelta]]:
+    """Return the list of (datetime, timedelta) encoded by encode_history."""
+    if data[0] != VERSION:
+        raise ValueError(f"unknown history encoding version {data[0]}")
+    n = (len(data) - 1) // 12
+    moments = array('q', data[1:1 + 8 * n])
+    adjustments = array('i', data[1 + 8 * n:])
+    if sys.byteorder == 'big':
+        moments.byteswap()
+        adjustments.byteswap()
+    return [
+        (EPOCH + timedelta(microseconds=us), timedelta(seconds=s))
+        for us, s in zip(moments, adjustments)
+    ]
@@ -0,0 +1,84 @@
+"""
+A worker that runs trf's daily maintenance, log cleanup, backup and pack,
+one job at a time on a thread of its own so that neither the status clock
+nor the keyboard waits for them.
+
+It is a thread rather than a process since FileStorage locks trf.fs for
+the process that opens it, so the pack has to run where the storage is
+open, and since the slow parts, file I/O, lzma and sha256, release the GIL.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class MaintenanceWorker:
+    """
+    A queue of named jobs run in the order submitted. A job fails if it
+    raises or returns (False, msg), the convention of the backup functions.
+    Failures are logged and kept, for the status bar, until the same job
+    next succeeds. on_change, if given, is called from the worker thread
+    whenever the status changes.
+    """
+
+    def __init__(self, logger, on_change=None):
+        self.logger = logger
+        self.on_change = on_change
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="trf-maintenance"
+        )
+        self.lock = threading.Lock()
+        self.queued = []
+        self.running = None
+        self.started = 0.0
+        self.failed = {}
+
+    def submit(self, name: str, func, *args):
+        with self.lock:
+            self.queued.append(name)
+        self.changed()
+        return self.executor.submit(self.run, name, func, args)
+
+    def run(self, name, func, args):
+        with self.lock:
+            self.queued.remove(name)
+            self.running = name
+            self.started = time.perf_counter()
+        self.changed()
+        try:
+            result = func(*args)
+        except Exception as e:
+            self.logger.exception(f"Maintenance job {name} failed")
+            result = (False, repr(e))
+        elapsed = time.perf_counter() - self.started
+        with self.lock:
+            self.running = None
+            if isinstance(result, tuple) and result and result[0] is False:
+                self.failed[name] = result[1]
+            else:
+                self.failed.pop(name, None)
+        if name in self.failed:
+            self.logger.error(f"{name} failed after {elapsed:.2f}s: {self.failed[name]}")
+        else:
+            self.logger.info(f"{name} finished in {elapsed:.2f}s")
+        self.changed()
+        return result
+
+    def changed(self):
+        if self.on_change is not None:
+            self.on_change()
+
+    def status(self) -> str:
+        """A few words for the status bar, empty when idle and nothing failed."""
+        with self.lock:
+            if self.running:
+                waiting = f" +{len(self.queued)}" if self.queued else ""
+                return f"{self.running} {time.perf_counter() - self.started:.0f}s{waiting}"
+            if self.failed:
+                return f"{', '.join(self.failed)} failed"
+            return ""
+
+    def shutdown(self):
+        """Drop the jobs not yet started and wait for the running one."""
+        self.executor.shutdown(wait=True, cancel_futures=True)
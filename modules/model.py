@@ -4,6 +4,35 @@ import os
 from modules.common import log_msg
 
 
+# The local date of a completion timestamp. Negative timestamps are
+# "floating" times stored as -UTC seconds (see common.datetime_to_seconds).
+COMPLETION_DAY = """CASE WHEN {completion} >= 0
+    THEN date({completion}, 'unixepoch', 'localtime')
+    ELSE date(-{completion}, 'unixepoch') END"""
+
+DAILY_INCREMENT = f"""
+    INSERT INTO DailyCompletions (goal_id, day, count)
+    VALUES ({{row}}.goal_id, {COMPLETION_DAY.format(completion="{row}.completion")}, 1)
+    ON CONFLICT (goal_id, day) DO UPDATE SET count = count + 1;
+"""
+
+DAILY_DECREMENT = f"""
+    UPDATE DailyCompletions SET count = count - 1
+    WHERE goal_id = {{row}}.goal_id
+    AND day = {COMPLETION_DAY.format(completion="{row}.completion")};
+    DELETE FROM DailyCompletions
+    WHERE goal_id = {{row}}.goal_id AND count <= 0;
+"""
+
+DAILY_INSERT_TRIGGER = f"""
+    CREATE TRIGGER IF NOT EXISTS completions_daily_insert
+    AFTER INSERT ON Completions
+    BEGIN
+        {DAILY_INCREMENT.format(row="NEW")}
+    END
+"""
+
+
 class DatabaseManager:
     def __init__(self, db_path: str = "goals.db", reset: bool = False):
         if reset and os.path.exists(db_path):
@@ -39,8 +68,77 @@ class DatabaseManager:
                 FOREIGN KEY (goal_id) REFERENCES goals(goal_id) ON DELETE CASCADE
             )
         """)
+
+        # Covers the per-goal window counts in list_goals and list_goal_windows.
+        self.cursor.execute("""
+            CREATE INDEX IF NOT EXISTS completions_goal_time
+            ON Completions (goal_id, completion)
+        """)
+
+        self.cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'DailyCompletions'"
+        )
+        new_daily_table = self.cursor.fetchone() is None
+        # Completions per goal per local day, kept current by the triggers
+        # below so that heatmaps never need to read the Completions table.
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS DailyCompletions (
+                goal_id INTEGER,
+                day TEXT,
+                count INTEGER DEFAULT 0,
+                PRIMARY KEY (goal_id, day),
+                FOREIGN KEY (goal_id) REFERENCES goals(goal_id) ON DELETE CASCADE
+            ) WITHOUT ROWID
+        """)
+        # Covers the all-goals sums in daily_counts.
+        self.cursor.execute("""
+            CREATE INDEX IF NOT EXISTS daily_completions_day
+            ON DailyCompletions (day, count)
+        """)
+        self.cursor.execute(DAILY_INSERT_TRIGGER)
+        self.cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS completions_daily_delete
+            AFTER DELETE ON Completions
+            BEGIN
+                {DAILY_DECREMENT.format(row="OLD")}
+            END
+        """)
+        self.cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS completions_daily_update
+            AFTER UPDATE OF goal_id, completion ON Completions
+            BEGIN
+                {DAILY_DECREMENT.format(row="OLD")}
+                {DAILY_INCREMENT.format(row="NEW")}
+            END
+        """)
+        if new_daily_table:
+            # databases created before DailyCompletions existed
+            self.rebuild_daily_completions()
         self.conn.commit()
 
+    def rebuild_daily_completions(self, goal_ids=None, commit: bool = True):
+        """
+        Recompute DailyCompletions from the Completions table, either for
+        every goal or only for those in goal_ids.
+        """
+        where, params = "", ()
+        if goal_ids is not None:
+            params = tuple(goal_ids)
+            where = f"WHERE goal_id IN ({', '.join('?' * len(params))})"
+        self.cursor.execute(f"DELETE FROM DailyCompletions {where}", params)
+        self.cursor.execute(
+            f"""
+            INSERT INTO DailyCompletions (goal_id, day, count)
+            SELECT goal_id, {COMPLETION_DAY.format(completion="completion")}, COUNT(*)
+            FROM Completions
+            {where}
+            GROUP BY 1, 2
+            """,
+            params,
+        )
+        if commit:
+            self.conn.commit()
+
     def add_goal(
         self,
         name: str,
@@ -138,12 +236,61 @@ class DatabaseManager:
             SELECT goal_id, name, time, goal, warn, created, 
             (SELECT COUNT(*) FROM Completions 
             WHERE goal_id = g.goal_id 
-            AND completion >= strftime('%s', 'now') - g.time) AS done
+            AND completion >= strftime('%s', 'now') - g.time) AS done,
+            modified
             FROM goals g
             ORDER BY name
         """)
         return self.cursor.fetchall()
 
+    def list_goal_windows(self, num_windows: int = 8):
+        """
+        Count the completions of every goal in each of its last num_windows
+        periods with a single pass over Completions.
+
+        Returns rows of (goal_id, window, count) where window 0 is the most
+        recent period, i.e., the one counted by 'done' in list_goals.
+        The CROSS JOIN keeps goals as the outer loop so that only the
+        completions within each goal's windows are read from the index.
+        """
+        self.cursor.execute(
+            """
+            SELECT c.goal_id,
+                (strftime('%s', 'now') - c.completion - 1) / g.time AS window,
+                COUNT(*)
+            FROM goals g CROSS JOIN Completions c ON c.goal_id = g.goal_id
+            WHERE g.time > 0
+            AND c.completion >= strftime('%s', 'now') - g.time * ?
+            GROUP BY c.goal_id, window
+            """,
+            (num_windows,),
+        )
+        return self.cursor.fetchall()
+
+    def daily_counts(self, since: str, goal_id: int | None = None):
+        """
+        Return (day, count) rows with day >= since, a 'YYYY-MM-DD' string,
+        for goal_id or, if goal_id is None, summed over all goals.
+        """
+        if goal_id is None:
+            self.cursor.execute(
+                """
+                SELECT day, SUM(count) FROM DailyCompletions
+                WHERE day >= ?
+                GROUP BY day
+                """,
+                (since,),
+            )
+        else:
+            self.cursor.execute(
+                """
+                SELECT day, count FROM DailyCompletions
+                WHERE goal_id = ? AND day >= ?
+                """,
+                (goal_id, since),
+            )
+        return self.cursor.fetchall()
+
     def list_completions(self, goal_id):
         """Retrieve all completions for a given goal_id."""
         self.cursor.execute(
@@ -184,6 +331,131 @@ class DatabaseManager:
         )
         self.conn.commit()
 
+    def get_goal_id(self, name: str):
+        """Return the goal_id of the goal with this name or None."""
+        self.cursor.execute("SELECT goal_id FROM goals WHERE name = ?", (name,))
+        result = self.cursor.fetchone()
+        return result[0] if result else None
+
+    def iter_goals(self, batch_size: int = 1000):
+        """
+        Yield (name, time, goal, warn, created, modified) for every goal.
+
+        A cursor of its own is stepped batch_size rows at a time so that only
+        one batch is ever held in memory.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT name, time, goal, warn, created, modified
+            FROM goals ORDER BY goal_id
+        """)
+        while rows := cursor.fetchmany(batch_size):
+            yield from rows
+
+    def iter_completions(self, batch_size: int = 1000):
+        """
+        Yield (name, completion) for every completion, grouped by goal and
+        oldest first, in the order of the completions_goal_time index so
+        that SQLite never has to sort.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT g.name, c.completion
+            FROM goals g CROSS JOIN Completions c ON c.goal_id = g.goal_id
+            ORDER BY g.goal_id, c.completion
+        """)
+        while rows := cursor.fetchmany(batch_size):
+            yield from rows
+
+    def bulk_import(self, records, batch_size: int = 10000, progress=None):
+        """
+        Insert goals and completions from an iterable of records, each either
+        ("goal", name, time, goal, warn, created, modified) or
+        ("completion", name, completion), as a single transaction.
+
+        A goal whose name already exists is kept as it is and the completions
+        are added to it, but only if its time and goal are the same, and its
+        name is reported in merged. If they differ, ValueError is raised.
+        Completions are inserted with executemany in batches of batch_size
+        and progress, if given, is called with the running (goals,
+        completions) counts after each batch. Nothing is committed if any
+        record fails. Returns (goals, completions, merged).
+
+        The per-row DailyCompletions trigger more than doubles the cost of
+        an insert, so it is dropped for the duration of the transaction and
+        the daily counts of the affected goals are rebuilt at the end.
+        """
+        cursor = self.conn.cursor()
+        goal_ids = {}  # name -> goal_id
+        merged = []  # the names of existing goals the completions are added to
+        pending = []
+        goals = completions = 0
+
+        def flush():
+            nonlocal completions
+            cursor.executemany(
+                "INSERT INTO Completions (goal_id, completion) VALUES (?, ?)",
+                pending,
+            )
+            completions += len(pending)
+            pending.clear()
+            if progress:
+                progress(goals, completions)
+
+        cursor.execute("BEGIN")
+        try:
+            cursor.execute("DROP TRIGGER completions_daily_insert")
+            for record in records:
+                if record[0] == "goal":
+                    _, name, time, goal, warn, created, modified = record
+                    warn = 0 if goal + warn < 0 else warn
+                    cursor.execute(
+                        """
+                        INSERT INTO goals (name, time, goal, warn, created, modified)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (name) DO NOTHING
+                        """,
+                        (name, time, goal, warn, created, modified),
+                    )
+                    if cursor.rowcount:
+                        goals += 1
+                        continue
+                    cursor.execute(
+                        "SELECT time, goal FROM goals WHERE name = ?", (name,)
+                    )
+                    if cursor.fetchone() != (time, goal):
+                        raise ValueError(
+                            f"A goal named '{name}' already exists"
+                            f" with a different period or goal"
+                        )
+                    merged.append(name)
+                    continue
+                _, name, completion = record
+                goal_id = goal_ids.get(name)
+                if goal_id is None:
+                    cursor.execute("SELECT goal_id FROM goals WHERE name = ?", (name,))
+                    result = cursor.fetchone()
+                    if result is None:
+                        raise ValueError(f"No goal named '{name}' for completion {completion}")
+                    goal_id = goal_ids[name] = result[0]
+                pending.append((goal_id, completion))
+                if len(pending) >= batch_size:
+                    flush()
+            flush()
+            touched = list(goal_ids.values())
+            for i in range(0, len(touched), 500):  # below SQLite's variable limit
+                self.rebuild_daily_completions(touched[i : i + 500], commit=False)
+            cursor.execute(DAILY_INSERT_TRIGGER)
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        log_msg(
+            f"Imported {goals} goals and {completions} completions,"
+            f" merged into {merged}."
+        )
+        return goals, completions, merged
+
     def show_goal(self, goal_id):
         self.cursor.execute(
             """
@@ -0,0 +1,106 @@
+"""
+Open the ZODB storage for trf from a URI, given by the TRFSTORAGE
+environment variable, e.g.
+
+    file:///home/me/trf/trf.fs          FileStorage, the default
+    memory://                           MappingStorage, lost on exit
+    zeo:///home/me/trf/zeo.sock         a ZEO server on a unix socket
+    zeo://localhost:8100                a ZEO server on a port
+
+FileStorage locks trf.fs for the process that opens it, so a second trf or
+a cron script can only share the database through a ZEO server, e.g.,
+started with
+
+    runzeo -a ~/trf/zeo.sock -f ~/trf/trf.fs
+
+The query string sizes the DB's connection pool and object cache,
+pool_size, cache_size (objects per connection) and cache_size_bytes, and,
+for zeo, the client's disk cache, client_cache_size in bytes, e.g.
+
+    zeo:///home/me/trf/zeo.sock?cache_size=20000&client_cache_size=100000000
+
+ZODB.FileStorage and ZEO are imported only when used, and ZEO, which is not
+a requirement of trf, only for a zeo URI.
+"""
+
+import os
+from urllib.parse import parse_qsl, urlsplit
+
+SCHEMES = ('file', 'memory', 'zeo')
+DB_OPTIONS = ('pool_size', 'cache_size', 'cache_size_bytes')
+ZEO_OPTIONS = ('client_cache_size',)
+
+
+class StorageSpec:
+    """
+    A parsed storage URI. path is the FileStorage file or the ZEO socket,
+    address the ZEO (host, port) and options the integer query parameters.
+    """
+
+    __slots__ = ('uri', 'scheme', 'path', 'address', 'options')
+
+    def __init__(self, uri: str, default_path: str):
+        parts = urlsplit(uri)
+        if parts.scheme not in SCHEMES:
+            raise ValueError(
+                f"storage URI {uri!r}: the scheme must be one of {', '.join(SCHEMES)}"
+            )
+        self.uri = uri
+        self.scheme = parts.scheme
+        self.path = None
+        self.address = None
+        if self.scheme == 'file':
+            # file://trf.fs, with no third slash, is relative
+            path = parts.netloc + parts.path
+            self.path = os.path.abspath(os.path.expanduser(path)) if path else default_path
+        elif self.scheme == 'zeo':
+            if parts.hostname:
+                self.address = (parts.hostname, parts.port or 8100)
+            elif parts.path:
+                self.path = parts.path
+            else:
+                raise ValueError(f"storage URI {uri!r}: no socket path or host")
+        allowed = DB_OPTIONS + (ZEO_OPTIONS if self.scheme == 'zeo' else ())
+        self.options = {}
+        for key, value in parse_qsl(parts.query):
+            if key not in allowed:
+                raise ValueError(f"storage URI {uri!r}: unknown option {key!r}")
+            try:
+                self.options[key] = int(value)
+            except ValueError:
+                raise ValueError(f"storage URI {uri!r}: {key} must be an integer")
+
+    def is_file(self, db_path: str = None) -> bool:
+        """True for a FileStorage, and, if db_path is given, on that file."""
+        return self.scheme == 'file' and (db_path is None or self.path == db_path)
+
+    def __str__(self):
+        if self.scheme == 'file':
+            return self.path
+        if self.scheme == 'zeo':
+            where = self.path or '%s:%s' % self.address
+            return f"ZEO server at {where}"
+        return "an in-memory MappingStorage"
+
+
+def open_storage(spec: StorageSpec):
+    """Return the storage for spec."""
+    if spec.scheme == 'file':
+        import ZODB.FileStorage
+        return ZODB.FileStorage.FileStorage(spec.path)
+    if spec.scheme == 'memory':
+        import ZODB.MappingStorage
+        return ZODB.MappingStorage.MappingStorage()
+    try:
+        import ZEO.ClientStorage
+    except ImportError:
+        raise ValueError(f"storage URI {spec.uri!r}: ZEO is not installed, pip install ZEO")
+    kwargs = {}
+    if 'client_cache_size' in spec.options:
+        kwargs['cache_size'] = spec.options['client_cache_size']
+    return ZEO.ClientStorage.ClientStorage(spec.path or spec.address, **kwargs)
+
+
+def db_options(spec: StorageSpec) -> dict:
+    """The keyword arguments for ZODB.DB given in spec's query string."""
+    return {key: spec.options[key] for key in DB_OPTIONS if key in spec.options}
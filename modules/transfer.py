@@ -0,0 +1,147 @@
+"""
+Streaming export and import of goals and completions as NDJSON or CSV.
+
+Both formats hold the same records, goals first and then completions, which
+refer to their goal by name:
+
+    {"type": "goal", "name": "exercise", "time": 604800, "goal": 3, "warn": -1,
+     "created": 1740000000, "modified": 1740000000}
+    {"type": "completion", "name": "exercise", "completion": 1740100000}
+
+CSV files have a header row with the FIELDS below and leave the columns
+that do not apply to a record empty. Every function here is a generator or
+consumes one, so memory use does not depend on the size of the database.
+"""
+
+import csv
+import json
+import sys
+import time
+
+FIELDS = ("type", "name", "time", "goal", "warn", "created", "modified", "completion")
+GOAL_FIELDS = ("name", "time", "goal", "warn", "created", "modified")
+
+
+def export_records(db_manager):
+    """Yield a dict for every goal and then for every completion."""
+    for row in db_manager.iter_goals():
+        yield {"type": "goal", **dict(zip(GOAL_FIELDS, row))}
+    for name, completion in db_manager.iter_completions():
+        yield {"type": "completion", "name": name, "completion": completion}
+
+
+def write_ndjson(records, out):
+    for record in records:
+        out.write(json.dumps(record))
+        out.write("\n")
+        yield record
+
+
+def write_csv(records, out):
+    writer = csv.DictWriter(out, fieldnames=FIELDS)
+    writer.writeheader()
+    for record in records:
+        writer.writerow(record)
+        yield record
+
+
+def read_ndjson(lines):
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(lines):
+    for row in csv.DictReader(lines):
+        yield {key: value for key, value in row.items() if value not in ("", None)}
+
+
+def import_records(records):
+    """
+    Convert record dicts to the tuples expected by DatabaseManager.bulk_import,
+    raising ValueError with the record number for anything malformed.
+    """
+    for num, record in enumerate(records, start=1):
+        try:
+            if record["type"] == "goal":
+                yield (
+                    "goal",
+                    record["name"],
+                    int(record["time"]),
+                    int(record["goal"]),
+                    int(record.get("warn", 0)),
+                    int(record.get("created", 0)),
+                    int(record.get("modified", 0)),
+                )
+            elif record["type"] == "completion":
+                yield ("completion", record["name"], int(record["completion"]))
+            else:
+                raise ValueError(f"unknown type '{record['type']}'")
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"record {num}: {e!r}") from e
+
+
+WRITERS = {"ndjson": write_ndjson, "csv": write_csv}
+READERS = {"ndjson": read_ndjson, "csv": read_csv}
+
+
+def format_for(path: str, fmt: str | None) -> str:
+    """Return fmt or, if it is None, the format implied by the extension of path."""
+    if fmt:
+        return fmt
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+class Progress:
+    """
+    Report running goal and completion counts on stderr, at most every
+    interval seconds and only when stderr is a terminal.
+    """
+
+    def __init__(self, label: str, interval: float = 0.5):
+        self.label = label
+        self.interval = interval
+        self.start = self.last = time.perf_counter()
+        self.show = sys.stderr.isatty()
+
+    def __call__(self, goals: int, completions: int):
+        now = time.perf_counter()
+        if self.show and now - self.last >= self.interval:
+            self.last = now
+            rate = completions / (now - self.start)
+            print(
+                f"\r{self.label} {goals} goals, {completions} completions"
+                f" ({rate:,.0f}/s)",
+                end="",
+                file=sys.stderr,
+            )
+
+    def done(self, goals: int, completions: int, merged=()):
+        elapsed = time.perf_counter() - self.start
+        if self.show:
+            print("\r\033[K", end="", file=sys.stderr)
+        print(
+            f"{self.label} {goals} goals and {completions} completions"
+            f" in {elapsed:.2f}s",
+            file=sys.stderr,
+        )
+        if merged:
+            # completions added to goals that were already in the database
+            print(
+                f"merged into {len(merged)} existing goals: {', '.join(merged)}",
+                file=sys.stderr,
+            )
+
+
+def count(records, progress: Progress, every: int = 10000):
+    """Pass records through, reporting progress every so many records."""
+    goals = completions = 0
+    for record in records:
+        if record["type"] == "goal":
+            goals += 1
+        else:
+            completions += 1
+            if not completions % every:
+                progress(goals, completions)
+        yield record
+    progress.done(goals, completions)
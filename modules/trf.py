@@ -1,8 +1,10 @@
 # trf/trf.py
+import asyncio
 import glob
-import importlib.resources
+import heapq
 import logging
 import os
+import random
 import re
 import shutil
 import string
@@ -11,19 +13,15 @@ import textwrap
 import threading
 import time
 import traceback
-from collections import OrderedDict
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 from datetime import date, datetime, timedelta
 from io import StringIO
-from logging.handlers import TimedRotatingFileHandler
 from typing import Any, Callable, Dict, List, Mapping
 
-import lorem
-import pyperclip
-import transaction
-import ZODB
-import ZODB.FileStorage
 from dateutil.parser import parse, parserinfo
-from lorem.text import TextLorem
 from persistent import Persistent
 # from prompt_toolkit import Application
 from prompt_toolkit.application import Application
@@ -37,9 +35,12 @@ from prompt_toolkit.layout import Float, FloatContainer, Layout, Window
 from prompt_toolkit.layout.containers import (ConditionalContainer,
                                               DynamicContainer, HSplit, VSplit,
                                               Window, WindowAlign)
-from prompt_toolkit.layout.controls import FormattedTextControl
+from prompt_toolkit.data_structures import Point
+from prompt_toolkit.layout.controls import (FormattedTextControl, UIContent,
+                                            UIControl)
 from prompt_toolkit.layout.dimension import D
 from prompt_toolkit.lexers import Lexer
+from prompt_toolkit.mouse_events import MouseEventType
 from prompt_toolkit.search import SearchDirection, start_search
 from prompt_toolkit.styles import Style
 from prompt_toolkit.styles.named_colors import NAMED_COLORS
@@ -49,13 +50,13 @@ from prompt_toolkit.widgets import (Frame, HorizontalLine, Label,
 from ruamel.yaml import YAML
 from ruamel.yaml.comments import CommentedMap
 
-from . import backup_dir, db_path, log_level, restore, trf_home
+from . import process_arguments
 from .__version__ import version
-from .backup import backup_to_zip, restore_from_zip, rotate_backups
+from .history import decode_history, encode_history
+from .maintenance import MaintenanceWorker
 
     # initialize the tracker manager as a singleton instance
 
-freq = 12
 mode = 'main'
 
 def setup_logging(trf_home, log_level=logging.INFO, backup_count=7):
@@ -67,7 +68,8 @@ def setup_logging(trf_home, log_level=logging.INFO, backup_count=7):
         log_level (int): The log level (e.g., logging.DEBUG, logging.INFO).
         backup_count (int): Number of backup log files to keep.
     """
-    global db, connection, root, transaction
+    from logging.handlers import TimedRotatingFileHandler
+
     log_dir = os.path.join(trf_home, "logs")
 
     # Ensure the logs directory exists
@@ -116,8 +118,11 @@ def setup_logging(trf_home, log_level=logging.INFO, backup_count=7):
 
     return logger
 
-# Set up logging
-logger = setup_logging(trf_home=trf_home, log_level=log_level, backup_count=7)
+# the root logger, given its handler by setup_logging in main()
+logger = logging.getLogger()
+
+# set from the command line by main()
+trf_home = log_level = restore = backup_dir = db_path = storage_spec = None
 
 def cleanup_old_logs():
     backup_count = 7
@@ -132,12 +137,20 @@ def cleanup_old_logs():
             logger.debug(f"Removed old log file: {log_file}")
         logger.info(f"Cleaned up {count} old log files.")
 
-def init_db(db_path):
+def init_db(db_path, spec=None):
     """
-    Initialize the ZODB database using the specified file.
+    Initialize the ZODB database using the storage given by spec, a
+    StorageSpec, or, by default, a FileStorage on the specified file.
     """
-    storage = ZODB.FileStorage.FileStorage(db_path)
-    db = ZODB.DB(storage)
+    import transaction
+    import ZODB
+
+    from .storage import StorageSpec, db_options, open_storage
+
+    if spec is None:
+        spec = StorageSpec('file://', db_path)
+    storage = open_storage(spec)
+    db = ZODB.DB(storage, **db_options(spec))
     connection = db.open()
     root = connection.root()
     return storage, db, connection, root, transaction
@@ -168,6 +181,8 @@ settings_map = CommentedMap({
     'yearfirst': True,
     'dayfirst': False,
     'η': 2,
+    'max_history': 12,
+    'pack_days': 7,
 })
 # Add comments to the dictionary
 settings_map.yaml_set_comment_before_after_key(
@@ -186,6 +201,14 @@ settings_map.yaml_set_comment_before_after_key(
     'η',
     before='\n[η] Use this integer multiple of "spread" for setting the \ntimely-to-tardy next confidence interval'
     )
+settings_map.yaml_set_comment_before_after_key(
+    'max_history',
+    before='\n[max_history] The number of the most recent completions used to \ncompute the average interval and spread of each tracker. Older \ncompletions are archived'
+    )
+settings_map.yaml_set_comment_before_after_key(
+    'pack_days',
+    before='\n[pack_days] Pack the database to remove the record of changes \nmade more than this many days ago. trf.fs in the home directory is \npacked once its backup chain is older than this. Use -1 to never pack'
+    )
 
 
 # this will be set in main() as a global variable
@@ -289,9 +312,183 @@ def sort_key(tracker):
     else:
         return (1, tracker.next_expected_completion)
 
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+class IntervalStats:
+    """
+    The intervals of a history together with their running total and a
+    sorted copy, all in microseconds, so that appending a completion or
+    dropping the oldest one updates the average and the MAD spread without
+    revisiting the other intervals.
+
+    The sorted copy is split at the average: the first `split` entries are
+    below it and `below` is their sum, so that the sum of the absolute
+    deviations is (split × avg - below) + (above - (n - split) × avg).
+    Moving the average only moves the split past the few entries between
+    the old and the new average.
+    """
+
+    def __init__(self, history):
+        self.intervals = deque()
+        self.ordered = []
+        self.total = 0
+        self.split = 0
+        self.below = 0
+        for i in range(1, len(history)):
+            self.add(history[i-1], history[i])
+
+    def add(self, previous, completion):
+        #          x[i+1]          y[i+1]           x[i]
+        interval = completion[0] + completion[1] - previous[0]
+        self.intervals.append(interval)
+        value = interval // ONE_MICROSECOND
+        if bisect_right(self.ordered, value) < self.split:
+            self.split += 1
+            self.below += value
+        insort(self.ordered, value)
+        self.total += value
+        self.rebalance()
+
+    def drop_oldest(self):
+        value = self.intervals.popleft() // ONE_MICROSECOND
+        i = bisect_left(self.ordered, value)
+        if i < self.split:
+            self.split -= 1
+            self.below -= value
+        del self.ordered[i]
+        self.total -= value
+        self.rebalance()
+
+    def rebalance(self):
+        if not self.ordered:
+            self.split = self.below = 0
+            return
+        avg = self.total / len(self.ordered)
+        while self.split < len(self.ordered) and self.ordered[self.split] < avg:
+            self.below += self.ordered[self.split]
+            self.split += 1
+        while self.split > 0 and self.ordered[self.split - 1] >= avg:
+            self.split -= 1
+            self.below -= self.ordered[self.split]
+
+    def average(self) -> timedelta:
+        return timedelta(microseconds=self.total / len(self.ordered))
+
+    def spread(self) -> timedelta:
+        n = len(self.ordered)
+        avg = self.total / n
+        above = self.total - self.below
+        deviations = (self.split * avg - self.below) + (above - (n - self.split) * avg)
+        return timedelta(microseconds=deviations / n)
+
+
 # this is a singleton instance initialized in main()
+class DateParser:
+    """
+    Parses the datetimes and timedeltas of completions with a parserinfo
+    built once for the dayfirst and yearfirst settings and precompiled
+    regexes. Tracker.parser() builds one and replaces it when the settings
+    change. The formats written by Tracker.format_dt, yymmddTHHMM and
+    YYYY-MM-DD HH:MM, are read by a regex, not by dateutil, and always as
+    written whatever the settings, so that a history round-trips through
+    the history editor.
+    """
+
+    __slots__ = ('key', 'info')
+
+    SHORT_DT = re.compile(r'(\d\d)(\d\d)(\d\d)T(\d\d)(\d\d)')
+    LONG_DT = re.compile(r'(\d{4})-(\d\d)-(\d\d) (\d\d):(\d\d)')
+    PERIOD = re.compile(r'(([+-]?)(\d+)([dhms]))+?')
+    EXPANDED_PERIOD = re.compile(r'(([+-]?)(\d+)\s(day|hour|minute|second)s?)+?')
+    SEPARATOR = re.compile(r',\s+')
+    UNITS = {
+        'd': 'days',
+        'day': 'days',
+        'h': 'hours',
+        'hour': 'hours',
+        'm': 'minutes',
+        'minute': 'minutes',
+        's': 'seconds',
+        'second': 'seconds',
+    }
+
+    def __init__(self, dayfirst: bool = False, yearfirst: bool = True):
+        self.key = (dayfirst, yearfirst)
+        self.info = parserinfo(dayfirst=dayfirst, yearfirst=yearfirst)
+
+    def parse_td(self, td: str) -> tuple[bool, timedelta]:
+        m = self.PERIOD.findall(td)
+        if not m:
+            m = self.EXPANDED_PERIOD.findall(str(td))
+            if not m:
+                return False, f"Invalid period string '{td}'"
+        kwds = {}
+        for g in m:
+            if g[3] not in self.UNITS:
+                return False, f'Invalid period argument: {g[3]}'
+            num = -int(g[2]) if g[1] == '-' else int(g[2])
+            if num:
+                kwds[self.UNITS[g[3]]] = num
+        return True, timedelta(**kwds)
+
+    def parse_dt(self, dt: str = "") -> tuple[bool, datetime]:
+        if not isinstance(dt, str) or not dt.strip():
+            return False, "Invalid datetime"
+        text = dt.strip()
+        if text == "now":
+            return True, datetime.now()
+        m = self.SHORT_DT.fullmatch(text)
+        if m:
+            yy, month, day, hour, minute = map(int, m.groups())
+            # the century as dateutil would choose it
+            year = self.info.convertyear(yy)
+        else:
+            m = self.LONG_DT.fullmatch(text)
+            if m:
+                year, month, day, hour, minute = map(int, m.groups())
+        if m:
+            try:
+                return True, datetime(year, month, day, hour, minute)
+            except ValueError:
+                # e.g., month 13: let dateutil have its say
+                pass
+        try:
+            return True, parse(dt, parserinfo=self.info)
+        except Exception as e:
+            msg = f"Error parsing datetime: {dt}\ne {repr(e)}"
+            return False, msg
+
+    def parse_completion(self, completion: str) -> tuple[datetime, timedelta]:
+        parts = [x.strip() for x in self.SEPARATOR.split(completion)]
+        dt = parts.pop(0)
+        td = parts.pop(0) if parts else None
+        msg = []
+        if not dt:
+            return False, ""
+        dtok, dt = self.parse_dt(dt)
+        if not dtok:
+            msg.append(dt)
+        if td:
+            tdok, td = self.parse_td(td)
+            if not tdok:
+                msg.append(td)
+        else:
+            # no td specified
+            td = timedelta(0)
+            tdok = True
+        if dtok and tdok:
+            return True, (dt, td)
+        return False, "; ".join(msg)
+
+
 class Tracker(Persistent):
-    max_history = 12 # depending on width, 6 rows of 2, 4 rows of 3, 3 rows of 4, 2 rows of 6
+    max_history = 12 # default for the max_history setting: depending on width, 6 rows of 2, 4 rows of 3, 3 rows of 4, 2 rows of 6
+    # the DateParser for the current settings, see parser()
+    _parser = None
+    # completions older than the most recent max_history, datetime -> timedelta,
+    # created when first needed. As a persistent object of its own it is
+    # only loaded when full_history is called.
+    archive = None
 
     @classmethod
     def format_dt(cls, dt: Any, long=False) -> str:
@@ -337,7 +534,7 @@ class Tracker(Persistent):
                 until.append(f'{minutes}m')
             if not until:
                 until.append('0m')
-            if short == 1:
+            if short < 2:
                 ret = ''.join(until[:2]) if short else sign + ''.join(until)
             elif short == 2:
                 ret = f"{round(days + hours/24 + minutes/(60*24), 1)}"
@@ -354,6 +551,15 @@ class Tracker(Persistent):
         dt, td = completion
         return f"{cls.format_dt(dt, long=True)}, {cls.format_td(td)}"
 
+    @classmethod
+    def parser(cls) -> 'DateParser':
+        """The DateParser for the current dayfirst and yearfirst settings."""
+        settings = tracker_manager.settings if tracker_manager is not None else settings_map
+        key = (settings.get('dayfirst', False), settings.get('yearfirst', True))
+        if cls._parser is None or cls._parser.key != key:
+            cls._parser = DateParser(*key)
+        return cls._parser
+
     @classmethod
     def parse_td(cls, td:str)->tuple[bool, timedelta]:
         """\
@@ -379,104 +585,24 @@ class Tracker(Persistent):
         >>> datetime(2015, 10, 15, 9, 0) + parse_duration("1w-2d+3h")[1]
         DateTime(2015, 10, 20, 12, 0, 0, tzinfo=ZoneInfo('UTC'))
         """
-
-        knms = {
-            'd': 'days',
-            'day': 'days',
-            'days': 'days',
-            'h': 'hours',
-            'hour': 'hours',
-            'hours': 'hours',
-            'm': 'minutes',
-            'minute': 'minutes',
-            'minutes': 'minutes',
-            's': 'seconds',
-            'second': 'second',
-            'seconds': 'seconds',
-        }
-
-        kwds = {
-            'days': 0,
-            'hours': 0,
-            'minutes': 0,
-            'seconds': 0,
-        }
-
-        period_regex = re.compile(r'(([+-]?)(\d+)([dhms]))+?')
-        expanded_period_regex = re.compile(r'(([+-]?)(\d+)\s(day|hour|minute|second)s?)+?')
-        # logger.debug(f"parse_td: {td}")
-        m = period_regex.findall(td)
-        if not m:
-            m = expanded_period_regex.findall(str(td))
-            if not m:
-                return False, f"Invalid period string '{td}'"
-        for g in m:
-            if g[3] not in knms:
-                return False, f'Invalid period argument: {g[3]}'
-
-            num = -int(g[2]) if g[1] == '-' else int(g[2])
-            if num:
-                kwds[knms[g[3]]] = num
-        td = timedelta(**kwds)
-        return True, td
-
+        return cls.parser().parse_td(td)
 
     @classmethod
     def parse_dt(cls, dt: str = "") -> tuple[bool, datetime]:
-        # if isinstance(dt, datetime):
-        #     return True, dt
-        if dt.strip() == "now":
-            dt = datetime.now()
-            return True, dt
-        elif isinstance(dt, str) and dt:
-            pi = parserinfo(
-                dayfirst=False,
-                yearfirst=True)
-            try:
-                dt = parse(dt, parserinfo=pi)
-                return True, dt
-            except Exception as e:
-                msg = f"Error parsing datetime: {dt}\ne {repr(e)}"
-                return False, msg
-        else:
-            return False, "Invalid datetime"
+        return cls.parser().parse_dt(dt)
 
     @classmethod
     def parse_completion(cls, completion: str) -> tuple[datetime, timedelta]:
-        parts = [x.strip() for x in re.split(r',\s+', completion)]
-        dt = parts.pop(0)
-        if parts:
-            td = parts.pop(0)
-        else:
-            td = timedelta(0)
-
-        # logger.debug(f"parts: {dt}, {td}")
-        msg = []
-        if not dt:
-            return False, ""
-        dtok, dt = cls.parse_dt(dt)
-        if not dtok:
-            msg.append(dt)
-        if td:
-            # logger.debug(f"{td = }")
-            tdok, td = cls.parse_td(td)
-            if not tdok:
-                msg.append(td)
-        else:
-            # no td specified
-            td = timedelta(0)
-            tdok = True
-        if dtok and tdok:
-            return True, (dt, td)
-        return False, "; ".join(msg)
+        return cls.parser().parse_completion(completion)
 
     @classmethod
     def parse_completions(cls, completions: List[str]) -> List[tuple[datetime, timedelta]]:
         completions = [x.strip() for x in completions.split('\n') if x.strip()]
+        parse_completion = cls.parser().parse_completion
         output = []
         msg = []
         for completion in completions:
-            ok, x = cls.parse_completion(completion)
+            ok, x = parse_completion(completion)
             if ok:
                 output.append(x)
             else:
@@ -495,13 +621,126 @@ class Tracker(Persistent):
         logger.info(f"Created tracker {self.name} ({self.doc_id})")
 
 
+    def __getstate__(self):
+        # pickle history as packed arrays (see modules/history.py) rather
+        # than as a datetime and a timedelta object per completion
+        state = super().__getstate__()
+        encoded = encode_history(state.get('history', []))
+        if encoded is not None:
+            state['history'] = encoded
+        return state
+
+    def __setstate__(self, state):
+        # trackers saved by earlier versions pickled their info as _info
+        # and their history as a list, which is kept as it is until the
+        # tracker is next written
+        state.pop('_info', None)
+        if isinstance(state.get('history'), bytes):
+            state['history'] = decode_history(state['history'])
+        super().__setstate__(state)
+
+    def _p_resolveConflict(self, old, saved, new):
+        """
+        Merge the state committed by another client, saved, with ours, new,
+        both changed from old, e.g., when two trf clients sharing a ZEO
+        storage record completions for the same tracker. A completion is
+        kept if neither side removed it or if either side added it, so both
+        sides' additions, removals and archiving survive; modified becomes
+        the later of the two. Any other attribute changed differently by
+        both sides, e.g., a rename, is a real conflict and the transaction
+        is retried. Neither the archive nor the max_history setting can be
+        read here, so a merged history that has grown beyond max_history
+        is truncated by the client after its commit.
+        """
+        from ZODB.POSException import ConflictError
+
+        def entries(state):
+            history = state.get('history', [])
+            if isinstance(history, bytes):
+                history = decode_history(history)
+            return set(history)
+
+        def same(a, b):
+            # references to persistent objects, the archive, only compare
+            # equal to the same reference and raise ValueError otherwise
+            try:
+                return a is b or a == b
+            except ValueError:
+                return False
+
+        missing = object()
+        resolved = dict(new)
+        for key in set(old) | set(saved) | set(new):
+            if key in ('history', 'modified'):
+                continue
+            o, s, n = (state.get(key, missing) for state in (old, saved, new))
+            if same(n, o) or same(n, s):
+                value = s
+            elif same(s, o):
+                value = n
+            else:
+                raise ConflictError(f"tracker {key} changed by both")
+            if value is missing:
+                resolved.pop(key, None)
+            else:
+                resolved[key] = value
+        o, s, n = entries(old), entries(saved), entries(new)
+        history = sorted((o & s & n) | (s - o) | (n - o))
+        encoded = encode_history(history)
+        resolved['history'] = history if encoded is None else encoded
+        modified = [state['modified'] for state in (saved, new) if state.get('modified')]
+        if modified:
+            resolved['modified'] = max(modified)
+        return resolved
+
     @property
     def info(self):
-        # Lazy initialization with re-computation logic
-        if not hasattr(self, '_info') or self._info is None:
-            # logger.debug(f"Computing info for {self.name} ({self.doc_id})")
-            self._info = self.compute_info()
-        return self._info
+        # ZODB never pickles _v_ attributes, so info is derived from history
+        # on first access after a load or a change and is never written
+        info = getattr(self, '_v_info', None)
+        if info is None:
+            info = self._v_info = self.compute_info()
+        return info
+
+    @property
+    def stats(self):
+        # like _v_info, rebuilt from history when missing and never written
+        stats = getattr(self, '_v_stats', None)
+        if stats is None:
+            stats = self._v_stats = IntervalStats(self.history)
+        return stats
+
+    @classmethod
+    def history_limit(cls) -> int:
+        settings = tracker_manager.settings if tracker_manager is not None else settings_map
+        return settings.get('max_history', cls.max_history)
+
+    def truncate_history(self):
+        # archive the oldest completions beyond the max_history setting or,
+        # if the setting has grown, bring archived completions back
+        excess = len(self.history) - self.history_limit()
+        if excess < 0 and self.archive:
+            while excess < 0 and self.archive:
+                dt = self.archive.maxKey()
+                self.history.insert(0, (dt, self.archive.pop(dt)))
+                excess += 1
+            self._v_stats = None
+            self._p_changed = True
+        elif excess > 0:
+            if self.archive is None:
+                from BTrees.OOBTree import OOBTree
+                self.archive = OOBTree()
+            for dt, td in self.history[:excess]:
+                # keys are unique: nudge a repeated datetime by a microsecond
+                while dt in self.archive:
+                    dt += ONE_MICROSECOND
+                self.archive[dt] = td
+            del self.history[:excess]
+            self._p_changed = True
+            stats = getattr(self, '_v_stats', None)
+            if stats is not None:
+                for _ in range(excess):
+                    stats.drop_oldest()
 
     def compute_info(self):
         # Example computation based on history, returning a dict
@@ -516,11 +755,7 @@ class Tracker(Persistent):
                 last_interval=timedelta(minutes=0), 
                 spread=timedelta(minutes=0), 
                 next_expected_completion=None,
-                early=None, 
-                timely=None, 
-                tardy=None, 
                 avg=None, 
-                plus_or_minus=f"{5*' '}~{5*' '}"
                 )
         else:
             result['last_completion'] = self.history[-1] if len(self.history) > 0 else None
@@ -531,84 +766,99 @@ class Tracker(Persistent):
             result['last_interval'] = None
             result['average_interval'] = None
             result['next_expected_completion'] = None
-            result['early'] = None
-            result['timely'] = None
-            result['tardy'] = None
             result['avg'] = None
-            result['plus_or_minus'] = f"{5*' '}~{5*' '}"
-            if result['num_completions'] > 0:
-                for i in range(len(self.history)-1):
-                    #                      x[i+1]                  y[i+1]               x[i]
-                    # logger.debug(f"{self.history[i+1]}")
-                    result['intervals'].append(self.history[i+1][0] + self.history[i+1][1] - self.history[i][0])
-                result['num_intervals'] = len(result['intervals'])
+            stats = self.stats
+            result['intervals'] = stats.intervals
+            result['num_intervals'] = len(stats.intervals)
             if result['num_intervals'] > 0:
                 # result['last_interval'] = intervals[-1]
-                if result['num_intervals'] == 1:
-                    result['average_interval'] = result['intervals'][-1]
-                else:
-                    result['average_interval'] = sum(result['intervals'], timedelta()) / result['num_intervals']
+                result['average_interval'] = stats.average()
                 result['next_expected_completion'] = result['last_completion'][0] + result['average_interval']
-                result['timely'] = result['next_expected_completion'] - timedelta(days=1)
-                result['tardy'] = result['next_expected_completion'] + timedelta(days=1)
                 change = result['intervals'][-1] - result['average_interval']
                 direction = UP if change > timedelta(0) else DOWN if change < timedelta(0) else RIGHT
                 result['avg'] = f"{Tracker.format_td(result['average_interval'], 2)}{direction}"
                 # logger.debug(f"{result['avg'] = }")
-                result['plus_or_minus'] = f"{Tracker.format_td(result['average_interval'], 3): ^11}"
             if result['num_intervals'] >= 2:
-                total = timedelta(minutes=0)
-                for interval in result['intervals']:
-                    if interval < result['average_interval']:
-                        total += result['average_interval'] - interval
-                    else:
-                        total += interval - result['average_interval']
-                result['spread'] = total / result['num_intervals']
-                result['n_x_spread'] = tracker_manager.settings['η'] * result['spread']
-                result['n_spread'] = f"{tracker_manager.settings['η']} × {Tracker.format_td(result['spread'], 3)} = {Tracker.format_td(result['n_x_spread'], 3)}"
-
-                result['plus_or_minus'] = f"{Tracker.format_td(result['average_interval'], 2): >5}{PLUS_OR_MINUS}{Tracker.format_td(result['n_x_spread'], 3): <5}"
-
-            if result['num_intervals'] >= 1:
-                result['early']  = result['next_expected_completion'] - (tracker_manager.settings['η']*2) * result['spread']
-                result['timely'] = result['next_expected_completion'] - tracker_manager.settings['η'] * result['spread']
-                result['tardy'] = result['next_expected_completion'] + tracker_manager.settings['η'] * result['spread']
-        logger.debug(f"returning {result['plus_or_minus'] = }")
-
-        self._info = result
-        self._p_changed = True
-        logger.debug(f"returning {result = }")
+                result['spread'] = stats.spread()
+        logger.debug(f"returning {result['avg'] = }")
 
         return result
 
     # XXX: Just for reference
     def add_to_history(self, new_event):
         self.history.append(new_event)
+        self._v_stats = None
         self.modified = datetime.now()
         self.invalidate_info()
         self._p_changed = True  # Mark object as changed in ZODB
 
+    def full_history(self) -> list[tuple[datetime, timedelta]]:
+        """The archived completions followed by the recent ones."""
+        archived = list(self.archive.items()) if self.archive is not None else []
+        return archived + self.history
+
     def format_history(self)->str:
         output = []
-        for completion in self.history:
+        for completion in self.full_history():
             output.append(Tracker.format_completion(completion, long=True))
         return '\n  '.join(output)
 
+    def due(self, eta=None) -> dict:
+        """
+        The values that depend on η: early, timely and tardy and the η ×
+        spread column. They are computed from info when shown, by default
+        for tracker_manager.eta, and cached by η, so a different η changes
+        neither info nor anything that is written.
+        """
+        if eta is None:
+            eta = tracker_manager.eta if tracker_manager is not None else settings_map['η']
+        info = self.info
+        cached = getattr(self, '_v_due', None)
+        if cached is None:
+            cached = self._v_due = {}
+        elif eta in cached:
+            return cached[eta]
+        result = dict(
+            early=None,
+            timely=None,
+            tardy=None,
+            n_x_spread=None,
+            n_spread='?',
+            plus_or_minus=f"{5*' '}~{5*' '}"
+            )
+        if info['num_intervals'] >= 1:
+            next, spread = info['next_expected_completion'], info['spread']
+            result['early'] = next - (eta*2) * spread
+            result['timely'] = next - eta * spread
+            result['tardy'] = next + eta * spread
+            result['plus_or_minus'] = f"{Tracker.format_td(info['average_interval'], 3): ^11}"
+        if info['num_intervals'] >= 2:
+            result['n_x_spread'] = eta * spread
+            result['n_spread'] = f"{eta} × {Tracker.format_td(spread, 3)} = {Tracker.format_td(result['n_x_spread'], 3)}"
+            result['plus_or_minus'] = f"{Tracker.format_td(info['average_interval'], 2): >5}{PLUS_OR_MINUS}{Tracker.format_td(result['n_x_spread'], 3): <5}"
+        cached[eta] = result
+        return result
+
     def invalidate_info(self):
         # Invalidate the cached dict so it will be recomputed on next access
-        if hasattr(self, '_info'):
-            delattr(self, '_info')
-        self.compute_info()
+        self._v_info = None
+        self._v_due = None
 
 
     def record_completion(self, completion: tuple[datetime, timedelta]):
         ok, msg = True, ""
         if not isinstance(completion, tuple) or len(completion) < 2:
             completion = (completion, timedelta(0))
-        self.history.append(completion)
-        self.history.sort(key=lambda x: x[0])
-        if len(self.history) > Tracker.max_history:
-            self.history = self.history[-Tracker.max_history:]
+        if not self.history or completion[0] >= self.history[-1][0]:
+            # the usual case: update the interval statistics in place
+            if self.history and getattr(self, '_v_stats', None) is not None:
+                self._v_stats.add(self.history[-1], completion)
+            self.history.append(completion)
+        else:
+            self.history.append(completion)
+            self.history.sort(key=lambda x: x[0])
+            self._v_stats = None
+        self.truncate_history()
 
         # Notify ZODB that this object has changed
         self.invalidate_info()
@@ -625,15 +875,18 @@ class Tracker(Persistent):
         return True, f"renamed {self.doc_id} from {original_name} to {self.name}"
 
     def record_completions(self, completions: list[tuple[datetime, timedelta]]):
+        # completions replaces the full history, archive included
         logger.debug(f"starting {self.history = }")
+        if self.archive is not None:
+            self.archive.clear()
         self.history = []
         for completion in completions:
             if not isinstance(completion, tuple) or len(completion) < 2:
                 completion = (completion, timedelta(0))
             self.history.append(completion)
         self.history.sort(key=lambda x: x[0])
-        if len(self.history) > Tracker.max_history:
-            self.history = self.history[-Tracker.max_history:]
+        self._v_stats = None
+        self.truncate_history()
         logger.debug(f"ending {self.history = }")
         self.invalidate_info()
         self.modified = datetime.now()
@@ -641,7 +894,10 @@ class Tracker(Persistent):
         return True, f"recorded completions for ..."
 
     def remove_completions(self):
+        if self.archive is not None:
+            self.archive.clear()
         self.history = []
+        self._v_stats = None
         self.invalidate_info()
         self.modified = datetime.now()
         self._p_changed = True
@@ -684,8 +940,8 @@ class Tracker(Persistent):
 
             # Sort and truncate history if necessary
             self.history.sort()
-            if len(self.history) > self.max_history:
-                self.history = self.history[-self.max_history:]
+            self._v_stats = None
+            self.truncate_history()
 
             # Notify ZODB that this object has changed
             self.modified = datetime.now()
@@ -698,39 +954,187 @@ class Tracker(Persistent):
 
     def get_tracker_info(self):
 
-        if not hasattr(self, '_info') or self._info is None:
-            self._info = self.compute_info()
-        logger.debug(f"{self._info = }")
-        logger.debug(f"{self._info['avg'] = }")
+        info = self.info
+        due = self.due()
+        logger.debug(f"{info = }")
+        logger.debug(f"{info['avg'] = }")
         # insert a placeholder to prevent date and time from being split across multiple lines when wrapping
         # format_str = f"%y-%m-%d{PLACEHOLDER}%H:%M"
         # logger.debug(f"{self.history = }")
         history = [f"{Tracker.format_dt(x[0])} {Tracker.format_td(x[1])}" for x in self.history] if self.history else []
         history = ', '.join(history)
-        intervals = [f"{Tracker.format_td(x, 3)}" for x in self._info['intervals']] if self._info.get('intervals') else []
+        intervals = [f"{Tracker.format_td(x, 3)}" for x in info['intervals']] if info.get('intervals') else []
         intervals = ', '.join(intervals) if intervals else ""
         return wrap(f"""\
  name:        {self.name}
  doc_id:      {self.doc_id}
  created:     {Tracker.format_dt(self.created)}
  modified:    {Tracker.format_dt(self.modified)}
- completions: ({self._info['num_completions']})
+ completions: ({info['num_completions']})
     {history}
- intervals:   ({self._info['num_intervals']})
+ intervals:   ({info['num_intervals']})
     {intervals}
-    average:  {self._info['avg']}
-    spread:   {Tracker.format_td(self._info['spread'], 3)}
-    η spread: {self._info.get('n_spread', '?')}
- next:    {Tracker.format_dt(self._info['next_expected_completion'])}
-    early:    next - 2 × η spread = {Tracker.format_dt(self._info.get('early', '?'))}
-    timely:   next - η spread     = {Tracker.format_dt(self._info.get('timely', '?'))}
-    tardy:    next + η spread     = {Tracker.format_dt(self._info.get('tardy', '?'))}
+    average:  {info['avg']}
+    spread:   {Tracker.format_td(info['spread'], 3)}
+    η spread: {due['n_spread']}
+ next:    {Tracker.format_dt(info['next_expected_completion'])}
+    early:    next - 2 × η spread = {Tracker.format_dt(due['early'])}
+    timely:   next - η spread     = {Tracker.format_dt(due['timely'])}
+    tardy:    next + η spread     = {Tracker.format_dt(due['tardy'])}
 """, 0)
 
+SORT_MODES = ('next', 'last', 'subject', 'id', 'modified')
+# the info datetimes that can be queried by range with due_between
+DUE_BOUNDS = ('next_expected_completion', 'early', 'tardy')
+# the DUE_BOUNDS that move with η
+ETA_BOUNDS = ('early', 'tardy')
+
+class SortIndexes:
+    """
+    For every sort mode, a list of (*sort key, doc_id) tuples kept in order
+    as trackers are added, changed and removed, so that a page of the list
+    is a slice instead of a sort of every tracker. doc_id breaks ties as
+    the iteration order of the trackers did for the stable sort.
+
+    The same is done with (datetime, doc_id) for each of the DUE_BOUNDS of
+    the trackers that have one so that range queries are a bisect and a
+    slice, O(log n + k).
+    """
+
+    def __init__(self, sort_key: Callable, trackers):
+        self.sort_key = sort_key  # (tracker, mode) -> tuple
+        self.key_of = {}  # doc_id -> {mode or bound: key or None}
+        for tracker in trackers:
+            self.key_of[tracker.doc_id] = self.keys_for(tracker)
+        self.ordered = {
+            name: sorted(keys[name] for keys in self.key_of.values() if keys[name])
+            for name in SORT_MODES + DUE_BOUNDS
+        }
+
+    def __len__(self):
+        return len(self.key_of)
+
+    def keys_for(self, tracker) -> dict:
+        keys = {mode: (*self.sort_key(tracker, mode), tracker.doc_id) for mode in SORT_MODES}
+        due = tracker.due()
+        for bound in DUE_BOUNDS:
+            dt = due[bound] if bound in ETA_BOUNDS else tracker.info.get(bound)
+            keys[bound] = (dt, tracker.doc_id) if dt else None
+        return keys
+
+    def refresh_due(self, trackers):
+        """Rebuild the orderings of the ETA_BOUNDS, the rest are unchanged, after η changes."""
+        for tracker in trackers:
+            keys = self.key_of.get(tracker.doc_id)
+            if keys is None:
+                continue
+            due = tracker.due()
+            for bound in ETA_BOUNDS:
+                keys[bound] = (due[bound], tracker.doc_id) if due[bound] else None
+        for bound in ETA_BOUNDS:
+            self.ordered[bound] = sorted(keys[bound] for keys in self.key_of.values() if keys[bound])
+
+    def update(self, tracker):
+        self.remove(tracker.doc_id)
+        keys = self.key_of[tracker.doc_id] = self.keys_for(tracker)
+        for name, key in keys.items():
+            if key:
+                insort(self.ordered[name], key)
+
+    def remove(self, doc_id: int):
+        keys = self.key_of.pop(doc_id, None)
+        if keys is None:
+            return
+        for name, key in keys.items():
+            if key:
+                ordered = self.ordered[name]
+                del ordered[bisect_left(ordered, key)]
+
+    def between(self, bound: str, start: datetime, end: datetime) -> list[int]:
+        """Return the doc_ids whose bound is in [start, end), in order."""
+        ordered = self.ordered[bound]
+        i = bisect_left(ordered, (start,))
+        j = bisect_left(ordered, (end,), i)
+        return [key[-1] for key in ordered[i:j]]
+
+    def position(self, mode: str, doc_id: int, reverse: bool = False):
+        """Return the position of doc_id in the mode's ordering or None."""
+        keys = self.key_of.get(doc_id)
+        if keys is None:
+            return None
+        i = bisect_left(self.ordered[mode], keys[mode])
+        return len(self.ordered[mode]) - 1 - i if reverse else i
+
+    def first_named(self, name: str):
+        """
+        Return the doc_id of the first tracker in subject order whose name
+        is not before name, or of the last tracker if every name is.
+        """
+        ordered = self.ordered['subject']
+        if not ordered:
+            return None
+        i = min(bisect_left(ordered, (0, name)), len(ordered) - 1)
+        return ordered[i][-1]
+
+    def page(self, mode: str, start: int, end: int, reverse: bool = False) -> list[int]:
+        """Return the doc_ids in positions start to end of the mode's ordering."""
+        ordered = self.ordered[mode]
+        if reverse:
+            n = len(ordered)
+            keys = ordered[max(n - end, 0):max(n - start, 0)][::-1]
+        else:
+            keys = ordered[start:end]
+        return [key[-1] for key in keys]
+
+
+class PageModel:
+    """
+    What one listing of a page shows: the doc_ids of its rows, in an array
+    so that the row of the cursor maps to a doc_id by indexing, and the
+    (bounds, next date, columns) of each row for TrackerLexer. list_trackers
+    builds a new model and replaces the last with a single assignment, so a
+    lookup sees either the old page or the new one, never a mixture, and
+    nothing outlives the page it describes. Rows are numbered from 1 since
+    line 0 of the list is the banner and tag a is row 1.
+    """
+
+    __slots__ = ('page', 'text', 'ids', 'rows')
+
+    def __init__(self, page: int = 0, text: str = '', ids=(), rows=()):
+        self.page = page
+        self.text = text
+        self.ids = array('q', ids)
+        self.rows = list(rows)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def id_for_row(self, row: int):
+        return self.ids[row - 1] if 1 <= row <= len(self.ids) else None
+
+    def id_for_tag(self, tag: str):
+        return self.id_for_row(tag_keys.index(tag) + 1) if tag in tag_keys else None
+
+    def row_for_id(self, doc_id: int):
+        # at most 26 rows
+        try:
+            return self.ids.index(doc_id) + 1
+        except ValueError:
+            return None
+
+    def row(self, row: int):
+        return self.rows[row - 1] if 1 <= row <= len(self.rows) else None
+
+    def bounds(self):
+        return (row[0] for row in self.rows)
+
+
 def page_banner(active_page_num: int, number_of_pages: int, sort_by: str):
     return f"{active_page_num}/{number_of_pages}: {sort_by}"
 
 class TrackerManager:
+    # how often save_data runs a change when its commit conflicts
+    commit_attempts = 8
 
     def __init__(self, storage, db, connection, root, transaction) -> None:
         # Ensure that all required arguments are provided during the first initialization
@@ -744,30 +1148,52 @@ class TrackerManager:
         self.root = root
         self.transaction = transaction
         self.trackers = {}
-        self.tag_to_id = {}
-        self.row_to_id = {}
-        self.id_to_row = {}
-        self.tag_to_row = {}
-        self.id_to_times = {}
+        # replaced, not changed, by each list_trackers
+        self.page_model = PageModel()
         self.active_page = 0
         self.num_pages = 0
         self.selected_id = None
         self.selected_tracker = None
         self.selected_row = (None, None)
         self.sort_by = "next"
+        # built on first use since computing the sort keys needs the settings
+        self.indexes = None
+        # the η values the list is shown with, the first for the colours and
+        # the early and tardy bounds and the rest as columns to compare, or
+        # None for the η setting. A view parameter that is never written.
+        self.etas = None
+        # the depth of nested batch() blocks, see save_data
+        self.batching = 0
+        # root['changes'] as of the last commit or sync, see sync
+        self.changes_seen = 0
         logger.info(f"using data from\n  {self.db}")
         self.load_data()
 
     def load_data(self):
+        from BTrees.IOBTree import IOBTree
         try:
             if 'settings' not in self.root:
                 self.root['settings'] = settings_map
                 self.transaction.commit()
             self.settings = self.root['settings']
             if 'trackers' not in self.root:
-                self.root['trackers'] = {}
+                self.root['trackers'] = IOBTree()
                 self.root['next_id'] = 1  # Initialize the ID counter
                 self.transaction.commit()
+            elif isinstance(self.root['trackers'], dict):
+                # Upgrade from a plain dict which, as part of the root record,
+                # was re-pickled in full by every commit. The trackers
+                # themselves are unchanged.
+                self.root['trackers'] = IOBTree(self.root['trackers'])
+                self.transaction.commit()
+                logger.info(f"Upgraded {len(self.root['trackers'])} trackers to an IOBTree.")
+            if 'changes' not in self.root:
+                # counts the commits of every client, see sync. A Length
+                # resolves concurrent increments without a conflict.
+                from BTrees.Length import Length
+                self.root['changes'] = Length()
+                self.transaction.commit()
+            self.changes_seen = self.root['changes']()
             self.trackers = self.root['trackers']
         except Exception as e:
             logger.error(f"Warning: could not load data from '{db_path}': {str(e)}")
@@ -776,15 +1202,32 @@ class TrackerManager:
     def restore_defaults(self):
         self.root['settings'] = settings_map
         self.settings = self.root['settings']
-        self.transaction.commit()
+        self.save_data()
         logger.info(f"Restored default settings:\n{self.settings}")
         self.refresh_info()
 
     def refresh_info(self):
+        # info is recomputed lazily, so this writes nothing to the database
         for _, v in self.trackers.items():
-            v.compute_info()
+            v.invalidate_info()
+        self.indexes = None
         logger.info("Refreshed tracker info.")
 
+    @property
+    def eta(self):
+        return self.etas[0] if self.etas else self.settings.get('η', 2)
+
+    def set_etas(self, etas: list):
+        """
+        Show the list with etas, see self.etas. Only Tracker.due and the
+        early and tardy orderings depend on η, so nothing else is redone
+        and nothing persistent is touched.
+        """
+        self.etas = list(etas) or None
+        if self.indexes is not None:
+            self.indexes.refresh_due(self.trackers.values())
+        logger.info(f"Listing with η {self.etas or self.eta}")
+
     # def set_setting(self, key, value):
     #     if key in self.settings:
     #         self.settings[key] = value
@@ -798,31 +1241,58 @@ class TrackerManager:
         return self.settings.get(key, None)
 
     def add_tracker(self, name: str) -> None:
-        doc_id = self.root['next_id']
-        # Create a new tracker with the current doc_id
-        tracker = Tracker(name, doc_id)
-        # Add the tracker to the trackers dictionary
-        self.trackers[doc_id] = tracker
-        # Increment the next_id for the next tracker
-        self.root['next_id'] += 1
-        # Save the updated data
-        self.save_data()
-
+        def add():
+            # read next_id afresh on each attempt, another client may have
+            # taken it
+            doc_id = self.root['next_id']
+            self.trackers[doc_id] = Tracker(name, doc_id)
+            self.root['next_id'] = doc_id + 1
+            return doc_id
+        doc_id = self.save_data(add)
+        if doc_id is None:
+            return None
+        self.reindex(doc_id)
         logger.info(f"Tracker '{name}' added with ID {doc_id}")
         return doc_id
 
     def get_tracker_from_tag(self, tag: str):
-        pagetag = (self.active_page, tag)
-        if pagetag not in self.tag_to_id:
+        model = self.page_model
+        doc_id = model.id_for_tag(tag)
+        if doc_id is None or doc_id not in self.trackers:
             return None
-        self.selected_id = self.tag_to_id[pagetag]
-        self.selected_tracker = self.trackers[self.tag_to_id[pagetag]]
-        self.selected_row = pagetag
-        return self.trackers[self.tag_to_id[pagetag]]
+        self.selected_id = doc_id
+        self.selected_tracker = self.trackers[doc_id]
+        self.selected_row = (model.page, model.row_for_id(doc_id))
+        return self.selected_tracker
 
 
+    def change_tracker(self, doc_id: int, method: str, *args):
+        """
+        Call the Tracker method on the tracker with doc_id, commit the change
+        with save_data and return the method's (ok, msg).
+        """
+        def change():
+            # another client may have deleted it
+            tracker = self.trackers.get(doc_id)
+            if tracker is None:
+                return False, "the tracker has been deleted"
+            return getattr(tracker, method)(*args)
+        result = self.save_data(change)
+        if result is None:
+            return False, "the change could not be saved"
+        tracker = self.trackers.get(doc_id)
+        if tracker is None:
+            self.reindex(doc_id)
+            return result
+        if len(tracker.history) > tracker.history_limit():
+            # merged with completions recorded by another client, see
+            # Tracker._p_resolveConflict
+            self.save_data(tracker.truncate_history)
+        self.reindex(doc_id)
+        return result
+
     def rename_tracker(self, doc_id: int, new_name: str):
-        ok, msg = self.trackers[doc_id].rename(new_name)
+        ok, msg = self.change_tracker(doc_id, 'rename', new_name)
         if not ok:
             display_message(msg, 'error')
             return
@@ -830,7 +1300,7 @@ class TrackerManager:
 
     def record_completion(self, doc_id: int, comp: tuple[datetime, timedelta]):
         # dt will be a datetime
-        ok, msg = self.trackers[doc_id].record_completion(comp)
+        ok, msg = self.change_tracker(doc_id, 'record_completion', comp)
         if not ok:
             display_message(msg)
             return
@@ -838,7 +1308,7 @@ class TrackerManager:
         display_message(f"{self.trackers[doc_id].get_tracker_info()}", 'info')
 
     def record_completions(self, doc_id: int, completions: list[tuple[datetime, timedelta]]):
-        ok, msg = self.trackers[doc_id].record_completions(completions)
+        ok, msg = self.change_tracker(doc_id, 'record_completions', completions)
         if not ok:
             display_message(msg, 'error')
             return
@@ -846,7 +1316,7 @@ class TrackerManager:
 
 
     def remove_completions(self, doc_id: int):
-        ok, msg = self.trackers[doc_id].remove_completions()
+        ok, msg = self.change_tracker(doc_id, 'remove_completions')
         if not ok:
             display_message(msg, 'error')
             return
@@ -861,27 +1331,27 @@ class TrackerManager:
             logger.debug(f"data for tracker {doc_id}:")
             logger.debug(f"   {doc_id:2> }. {self.trackers[doc_id].get_tracker_data()}")
 
-    def sort_key(self, tracker):
-        forecast_dt = tracker._info.get('next_expected_completion', None) if hasattr(tracker, '_info') else None
-        last_dt = tracker._info.get('last_completion', None) if hasattr(tracker, '_info') else None
-        early_dt = tracker._info.get('timely', None) if hasattr(tracker, '_info') else None
-        if self.sort_by == "next":
+    def sort_key(self, tracker, sort_by: str = None):
+        sort_by = sort_by or self.sort_by
+        forecast_dt = tracker.info.get('next_expected_completion', None)
+        last_dt = tracker.info.get('last_completion', None)
+        if sort_by == "next":
             if forecast_dt:
                 return (0, forecast_dt)
             if last_dt:
                 return (1, last_dt)
             return (2, tracker.doc_id)
-        if self.sort_by == "last":
+        if sort_by == "last":
             if last_dt:
                 return (0, last_dt)
             if forecast_dt:
                 return (1, forecast_dt)
             return (2, tracker.doc_id)
-        if self.sort_by == "subject":
+        if sort_by == "subject":
             return (0, tracker.name)
-        if self.sort_by == "id":
+        if sort_by == "id":
             return (1, tracker.doc_id)
-        if self.sort_by == "modified":
+        if sort_by == "modified":
             return (1, tracker.modified)
         else: # next
             if forecast_dt:
@@ -890,78 +1360,186 @@ class TrackerManager:
                 return (1, last_dt)
             return (2, tracker.doc_id)
 
-    def get_sorted_trackers(self):
-        # Extract the list of trackers
-        trackers = [v for k, v in self.trackers.items()]
-        # Sort the trackers
+    def present(self, doc_ids) -> list:
+        """The trackers with doc_ids, skipping any that no longer exist."""
+        trackers = (self.trackers.get(doc_id) for doc_id in doc_ids)
+        return [tracker for tracker in trackers if tracker is not None]
+
+    def get_indexes(self) -> SortIndexes:
+        if self.indexes is None:
+            self.indexes = SortIndexes(self.sort_key, self.trackers.values())
+        return self.indexes
+
+    def reindex(self, doc_id: int):
+        """Update the sort indexes after the tracker with doc_id was added, changed or removed."""
+        if self.indexes is None:
+            return
+        tracker = self.trackers.get(doc_id)
+        if tracker is None:
+            self.indexes.remove(doc_id)
+        else:
+            self.indexes.update(tracker)
+
+    def due_between(self, start: datetime, end: datetime, bound: str = 'next_expected_completion') -> list:
+        """
+        Return the trackers whose bound, one of DUE_BOUNDS, falls in
+        [start, end), ordered by bound.
+        """
+        return self.present(self.get_indexes().between(bound, start, end))
+
+    def agenda(self, days: int = 7) -> str:
+        """
+        List the trackers that are already past tardy and then, day by day,
+        those expected in the next days days.
+        """
+        now = datetime.now()
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        name_width = shutil.get_terminal_size()[0] - 20
+        lines = [f" agenda  {today.strftime('%y-%m-%d')} + {days}d"]
+        tardy = self.due_between(datetime.min, now, 'tardy')
+        if tardy:
+            lines.append("\n past tardy")
+            # the most recently overdue, a page at most
+            for tracker in tardy[-26:]:
+                next = tracker.info['next_expected_completion']
+                lines.append(f"   {next.strftime('%y-%m-%d')}  {tracker.name[:name_width]}")
+            if len(tardy) > 26:
+                lines.append(f"   … and {len(tardy) - 26} more")
+        for day in range(days):
+            start = today + timedelta(days=day)
+            due = self.due_between(start, start + timedelta(days=1))
+            if not due:
+                continue
+            lines.append(f"\n {start.strftime('%a %b %-d')}")
+            for tracker in due:
+                next = tracker.info['next_expected_completion']
+                lines.append(f"   {next.strftime('%H:%M')}  {tracker.name[:name_width]}")
+        if len(lines) == 1:
+            lines.append("\n   nothing due")
+        return "\n".join(lines)
+
+    def get_sorted_trackers(self, start: int = 0, end: int = None):
+        # positions start to end of the current ordering
+        indexes = self.get_indexes()
+        end = len(indexes) if end is None else end
         reverse = True if self.sort_by == "modified" else False
-        return sorted(trackers, key=self.sort_key, reverse=reverse)
+        return self.present(indexes.page(self.sort_by, start, end, reverse))
 
-    def list_trackers(self):
-        name_width = shutil.get_terminal_size()[0] - 45
-        self.num_pages = (len(self.trackers) + 25) // 26
+    def get_position(self, doc_id: int):
+        """Return the position of doc_id in the current ordering or None."""
+        reverse = True if self.sort_by == "modified" else False
+        return self.get_indexes().position(self.sort_by, doc_id, reverse)
 
-        sort = self.sort_by + DOWN if self.sort_by == 'modified' else self.sort_by + UP
-        n = self.settings.get('η', None)
+    def jump_to_name(self, name: str):
+        """
+        Select the first tracker, in subject order, whose name is not before
+        name and show the page or scroll to the row it is on.
+        """
+        doc_id = self.get_indexes().first_named(name)
+        if doc_id is None:
+            return None
+        position = self.get_position(doc_id)
+        self.selected_id = doc_id
+        if scroll_view[0]:
+            scroll_control.cursor = position
+        else:
+            self.active_page = position // 26
+            self.selected_row = (self.active_page, position % 26 + 1)
+        return self.trackers.get(doc_id)
+
+    def list_banner(self, name_width: int) -> str:
+        n = self.eta
         if n:
             interval = f" η={n} {int(round(100*(1 - 1/(n*n)), 0))}%"
             # interval = f"{int(round(100*(1 - 1/(n*n)), 0))}% span"
         else: #        " n=3 89%"
             interval = "interval"
-
-        set_pages(page_banner(self.active_page + 1, self.num_pages, sort))
         # banner = f"{ZWNJ} tag     next      {interval}     last        subject\n"
         sub = "subject"
-        banner = f"{ZWNJ} tag     {sub:<{name_width}}  next      {interval}     last \n"
+        compared = ''.join(f"  {ETA}={n:<5g}" for n in self.compared_etas())
+        return f"{ZWNJ} tag     {sub:<{name_width}}  next      {interval}  {compared}   last "
+
+    def compared_etas(self) -> list:
+        """The η values shown as columns beside the first."""
+        return self.etas[1:] if self.etas else []
+
+    def name_width(self, width: int) -> int:
+        # 45 for the other columns and 9 for each compared η
+        return width - 45 - 9 * len(self.compared_etas())
+
+    def format_row(self, tracker, tag: str, name_width: int):
+        """
+        Return the text of the list row for tracker together with the
+        (bounds, next date, columns) TrackerLexer styles it from.
+        """
+        parts = [x.strip() for x in tracker.name.split('@')]
+        tracker_name = parts[0]
+        if len(tracker_name) > name_width:
+            tracker_name = tracker_name[:name_width - 1] + "…"
+        forecast_dt = tracker.info.get('next_expected_completion', None)
+        due = tracker.due()
+        early, timely, tardy = due['early'], due['timely'], due['tardy']
+        plus_or_minus = due['plus_or_minus']
+        # η × spread for each compared η
+        compared = ''.join(
+            f"  {PLUS_OR_MINUS}{Tracker.format_td(x, 3) if x else '~': <6}"
+            for x in (tracker.due(n)['n_x_spread'] for n in self.compared_etas())
+            )
+        if tracker.history:
+            last = tracker.history[-1][0].strftime("%y-%m-%d")
+        else:
+            last = "~"
+        next = forecast_dt.strftime("%y-%m-%d") if forecast_dt else center_text("~", 8)
+        times = (
+            early.strftime("%y-%m-%d") if early else '',
+            timely.strftime("%y-%m-%d") if timely else '',
+            tardy.strftime("%y-%m-%d") if tardy else '')
+        # rows.append(f" {tag}{" "*4}{next}{" "*2}{last}{" "*2}{interval}{" " * 3}{tracker_name}")
+        #             1  1    4         13      2       8       2      8       3
+        this_row = f" {tag}{' '*2}{next}{' '*2}{plus_or_minus}{' '*2}{last}{' '*2}{tracker_name:<{name_width}}"
+        return this_row, (times, next.strip(), (
+            f"  {tag}  ",
+            f"  {' '.join(tracker_name.split()):<{name_width}}",
+            f"  {next.strip(): ^8}",
+            format_spread(plus_or_minus.strip()) + compared,
+            f"  {last: ^8}",
+            ))
+
+    def list_trackers(self):
+        name_width = self.name_width(shutil.get_terminal_size()[0])
+        self.num_pages = (len(self.get_indexes()) + 25) // 26
+
+        sort = self.sort_by + DOWN if self.sort_by == 'modified' else self.sort_by + UP
+        set_pages(page_banner(self.active_page + 1, self.num_pages, sort))
+        banner = f"{self.list_banner(name_width)}\n"
         rows = []
 
         count = 0 
 
         start_index = self.active_page * 26
         end_index = start_index + 26
-        sorted_trackers = self.get_sorted_trackers()
-        sigma = self.settings.get('η', 1)
         logger.debug(f"listing {self.active_page = }, {start_index = }, {end_index = }")
-        for tracker in sorted_trackers[start_index:end_index]:
-            parts = [x.strip() for x in tracker.name.split('@')]
-            tracker_name = parts[0]
-            if len(tracker_name) > name_width:
-                tracker_name = tracker_name[:name_width - 1] + "…"
-            forecast_dt = tracker._info.get('next_expected_completion', None) if hasattr(tracker, '_info') else None
-            early = tracker._info.get('early', '') if hasattr(tracker, '_info') else ''
-            timely = tracker._info.get('timely', '') if hasattr(tracker, '_info') else ''
-            tardy = tracker._info.get('tardy', '') if hasattr(tracker, '_info') else ''
-            plus_or_minus = tracker._info.get('plus_or_minus', '') if hasattr(tracker, '_info') else f"{5*' '}~{5*' '}"
-            average = tracker._info.get('average_interval', '') if hasattr(tracker, '_info') else ''
-            if tracker.history:
-                last = tracker.history[-1][0].strftime("%y-%m-%d")
-            else:
-                last = "~"
-            next = forecast_dt.strftime("%y-%m-%d") if forecast_dt else center_text("~", 8)
-            avg = tracker._info.get('avg', None) if hasattr(tracker, '_info') else None
-            interval = f"{avg: <8}" if avg else f"{'~': ^8}"
+        ids = []
+        list_rows = []
+        for tracker in self.get_sorted_trackers(start_index, end_index):
             tag = tag_keys[count]
-            self.id_to_times[tracker.doc_id] = (
-                early.strftime("%y-%m-%d") if early else '',
-                timely.strftime("%y-%m-%d") if timely else '',
-                tardy.strftime("%y-%m-%d") if tardy else '')
-            self.tag_to_id[(self.active_page, tag)] = tracker.doc_id
-            self.row_to_id[(self.active_page, count+1)] = tracker.doc_id
-            self.id_to_row[tracker.doc_id] =  (self.active_page, count+1)
-            self.tag_to_row[(self.active_page, tag)] = (self.active_page, count+1) # count+1
+            this_row, row = self.format_row(tracker, tag, name_width)
             count += 1
-            # rows.append(f" {tag}{" "*4}{next}{" "*2}{last}{" "*2}{interval}{" " * 3}{tracker_name}")
-            #             1  1    4         13      2       8       2      8       3
-            this_row = f" {tag}{' '*2}{next}{' '*2}{plus_or_minus}{' '*2}{last}{' '*2}{tracker_name:<{name_width}}"
             rows.append(this_row)
+            ids.append(tracker.doc_id)
+            list_rows.append(row)
             logger.debug(f"{this_row = }")
+        model = PageModel(self.active_page, banner +"\n".join(rows), ids, list_rows)
+        self.page_model = model
+        scheduler.set_crossings(model.bounds())
         if self.selected_id:
-            self.selected_row = self.id_to_row[self.selected_id]
-        return banner +"\n".join(rows)
+            row = model.row_for_id(self.selected_id)
+            self.selected_row = (model.page, row) if row else (model.page, 0)
+        return model.text
 
     def set_active_page(self, page_num):
         logger.debug(f"set_active_page {page_num = }")
-        if 0 <= page_num < (len(self.trackers) + 25) // 26:
+        if 0 <= page_num < (len(self.get_indexes()) + 25) // 26:
             self.active_page = page_num
             logger.debug(f"setting active page to {page_num = }, {self.active_page = }")
             display_area.buffer.cursor_position = (
@@ -999,35 +1577,187 @@ class TrackerManager:
         logger.debug(f"first page: {self.selected_row = }")
 
     def get_tracker_from_row(self):
+        if scroll_view[0]:
+            doc_id = scroll_control.selected_id()
+            if doc_id is None or doc_id not in self.trackers:
+                return None
+            self.selected_id = doc_id
+            self.selected_tracker = self.trackers[doc_id]
+            return self.selected_tracker
         row = display_area.document.cursor_position_row
-        pagerow = (self.active_page, row)
-        if pagerow not in self.row_to_id:
+        model = self.page_model
+        doc_id = model.id_for_row(row)
+        if doc_id is None or doc_id not in self.trackers:
             return None
-        # logger.debug(f"{self.row_to_id = }; {pagerow = }")
-        self.selected_row = pagerow
-        self.selected_id = self.row_to_id[pagerow]
-        self.selected_tracker = self.trackers[self.row_to_id[pagerow]]
+        self.selected_row = (model.page, row)
+        self.selected_id = doc_id
+        self.selected_tracker = self.trackers[doc_id]
         logger.debug(f"returning {self.selected_tracker.doc_id = }; {self.selected_tracker.name = }")
-        return self.trackers[self.row_to_id[pagerow]]
+        return self.selected_tracker
+
+    def save_data(self, change=None, *args):
+        """
+        Call change(*args), if given, and commit. Return change's result, or
+        True without a change, and None if the commit failed.
 
-    def save_data(self):
-        logger.info(f"Saving data: {self.trackers = }")
-        self.root['trackers'] = self.trackers
-        self.transaction.commit()
+        With several clients on one storage a commit can raise a
+        ConflictError that Tracker._p_resolveConflict cannot resolve, e.g.,
+        when two clients add a tracker at once and both take next_id. The
+        transaction is then aborted and change, which makes its changes
+        again from the other client's state, is retried up to
+        commit_attempts times. Changes made before save_data was called
+        cannot be remade and are lost.
+
+        Within a batch() change is only called, the commit is the batch's.
+
+        Every commit counts itself in root['changes'] so that sync can tell
+        when another client has committed too.
+        """
+        from ZODB.POSException import ConflictError
+
+        if self.batching:
+            return change(*args) if change is not None else True
+        # self.trackers is an IOBTree so only the changed trackers and
+        # buckets are written
+        logger.debug("Saving data")
+        for attempt in range(1, self.commit_attempts + 1):
+            try:
+                result = change(*args) if change is not None else True
+                self.root['changes'].change(1)
+                self.transaction.commit()
+                self.changes_seen += 1
+                # another client's commit, merged with this one or seen on
+                # a retry, leaves the count further on
+                self.sync_changes()
+                return result
+            except ConflictError as e:
+                self.transaction.abort()
+                if change is None or attempt == self.commit_attempts:
+                    logger.error(f"Commit failed after {attempt} attempts, changes discarded: {e}")
+                    return None
+                logger.info(f"Commit attempt {attempt} conflicted, retrying: {e}")
+                # back off, for a random while, so that clients which have
+                # just conflicted do not retry in step
+                time.sleep(random.uniform(0, min(0.02 * 2 ** attempt, 1)))
+                # and see the commits that conflicted, which a ZEO client
+                # may not yet have been told of
+                self.connection.sync()
+
+    def sync(self) -> bool:
+        """
+        Begin a new transaction, so that the commits of other clients on
+        the storage are seen, and return True if there were any. Their
+        trackers may have been added, changed or deleted, so the indexes
+        are then dropped and rebuilt on next use.
+        """
+        if self.batching:
+            return False
+        self.transaction.begin()
+        return self.sync_changes()
+
+    def sync_changes(self) -> bool:
+        changes = self.root.get('changes')
+        if changes is None or changes() == self.changes_seen:
+            return False
+        logger.info(f"{changes() - self.changes_seen} commits by other clients")
+        self.changes_seen = changes()
+        self.settings = self.root['settings']
+        self.indexes = None
+        return True
+
+    @contextmanager
+    def batch(self):
+        """
+        Make the changes of a bulk operation, e.g., creating or deleting
+        many trackers, one transaction: save_data only calls its change
+        within the block and the commit is made at the end of the outermost
+        block, or, if the block raises, everything is aborted. Use
+        savepoint() within the block for the parts that may fail alone.
+
+        A block cannot be run again, so a commit that still conflicts after
+        save_data's attempts raises ConflictError, with everything aborted.
+        save_batch runs the block again instead.
+        """
+        from ZODB.POSException import ConflictError
+
+        self.batching += 1
+        try:
+            yield self
+        except BaseException:
+            self.batching -= 1
+            if not self.batching:
+                self.transaction.abort()
+                # some of the aborted changes may have been indexed
+                self.indexes = None
+                logger.error("Batch aborted")
+            raise
+        self.batching -= 1
+        if not self.batching and self.save_data() is None:
+            # the commit failed and was aborted
+            self.indexes = None
+            raise ConflictError("the batch could not be committed and was discarded")
+
+    def save_batch(self, body, *args) -> bool:
+        """
+        Run body(*args) as a batch and commit it with save_data, which, when
+        the commit conflicts, aborts and runs body again from the other
+        client's state. Returns False, with everything aborted, if it could
+        not be committed.
+        """
+        def change():
+            self.batching += 1
+            try:
+                body(*args)
+            except BaseException:
+                if self.batching == 1:
+                    self.transaction.abort()
+                    self.indexes = None
+                    logger.error("Batch aborted")
+                raise
+            finally:
+                self.batching -= 1
+            return True
+        if self.save_data(change) is None:
+            # some of the aborted changes may have been indexed
+            self.indexes = None
+            return False
+        return True
+
+    @contextmanager
+    def savepoint(self):
+        """
+        Within a batch, undo the changes made in the block, and only those,
+        if it raises an Exception, which is logged and not raised again, so
+        that, e.g., one tracker that cannot be created does not cost the
+        others.
+        """
+        savepoint = self.transaction.savepoint()
+        try:
+            yield savepoint
+        except Exception:
+            savepoint.rollback()
+            # the indexes may have seen the undone changes
+            self.indexes = None
+            logger.exception("Rolled back to the savepoint")
 
     def update_tracker(self, doc_id, tracker):
-        self.trackers[doc_id] = tracker
-        self.save_data()
+        def update():
+            self.trackers[doc_id] = tracker
+        self.save_data(update)
+        self.reindex(doc_id)
 
     def delete_tracker(self, doc_id):
+        def delete():
+            self.trackers.pop(doc_id, None)
         if doc_id in self.trackers:
-            del self.trackers[doc_id]
-            self.save_data()
+            self.save_data(delete)
+            self.reindex(doc_id)
 
     def edit_tracker_history(self, label: str):
         tracker = self.get_tracker_from_tag(label)
         if tracker:
             tracker.edit_history()
+            self.reindex(tracker.doc_id)
             self.save_data()
         else:
             logger.error(f"No tracker found corresponding to label {label}.")
@@ -1040,7 +1770,9 @@ class TrackerManager:
         return tracker
 
     def get_row_from_id(self, doc_id):
-        page, row = self.id_to_row.get(doc_id, (None, None))
+        model = self.page_model
+        row = model.row_for_id(doc_id)
+        return (model.page, row) if row else (None, None)
 
     def close(self):
         # Make sure to commit or abort any ongoing transaction
@@ -1060,10 +1792,8 @@ class TrackerManager:
             self.connection.close()
             self.db.close()
 
-# Initialize the ZODB database
-storage, db, connection, root, transaction = init_db(db_path)
-
-tracker_manager = TrackerManager(storage, db, connection, root, transaction)
+# opened by main() once the command line has been read
+tracker_manager = None
 
 tag_keys = list(string.ascii_lowercase)
 
@@ -1208,85 +1938,79 @@ class TrackerLexer(Lexer):
     def __init__(self):
         if not hasattr(self, '_initialized'):
             self._initialized = True
-            now = datetime.now()
+            self.crossed = 0
+
+    def invalidation_hash(self):
+        # BufferControl keeps the lexed document until either the text or
+        # this changes, so the colours are recomputed at a bound crossing
+        return (id(self), self.crossed)
 
     def lex_document(self, document):
         # logger.debug("lex_document called")
-        active_page = tracker_manager.active_page
         lines = document.lines
         now = datetime.now().strftime("%y-%m-%d")
-        width = shutil.get_terminal_size()[0] 
+        width = shutil.get_terminal_size()[0]
+        model = tracker_manager.page_model
+        if document.text != model.text:
+            model = PageModel()
+        # (plain, highlighted) fragments by line number, kept for as long as
+        # BufferControl keeps this function, i.e., until the text or the
+        # invalidation hash changes, so moving the cursor just picks one
+        cache = {}
+
         def get_line_tokens(line_number):
-            line = lines[line_number]
-            tokens = []
-            if is_current_row(line_number) and line_number > 0:
-                # Apply style to the whole line with a background for the current line
-                list_style = highlight_style
-                line = f"{line:<{width+1}}"
-            else:
-                list_style = tracker_style
-                # Apply no special style for other lines
-                # return [('class:default', line)]
-
-            if line and line[0] == ' ':  # does line start with a space
-                parts = line.split()
-                if len(parts) < 5:
-                    return [(list_style.get('default', ''), line)]
-
-                # Extract the parts of the line
-                tag, next_date, interval, last_date, tracker_name = parts[0], parts[1], parts[2], parts[3], " ".join(parts[4:])
-                # tag, next_date, interval, last_date, tracker_name = parts[0], " ".join(parts[1:]), parts[2], parts[3], parts[4]
-                tracker_name = f"  {tracker_name:<{width-45}}"
-                id = tracker_manager.tag_to_id.get((active_page, tag), None)
-                early, timely, tardy = tracker_manager.id_to_times.get(id, (None,None, None))
-                # logger.debug(f"{width = }, {tracker_name = },  ")
-
-                # Determine styles based on dates
-                if early and timely and tardy:
-                    if now < early:
-                        this_style = list_style.get('next-cold', '')
-                    if early <= now and now < timely:
-                        this_style = list_style.get('next-cool', '')
-                    elif timely <= now and now < tardy:
-                        this_style = list_style.get('next-warm', '')
-                    elif tardy <= now:
-                        this_style = list_style.get('next-hot', '')
-                elif next_date != "~" and next_date > now:
-                    this_style = list_style.get('next-cool', '')
-                else:
-                    this_style = list_style.get('default', '')
-                next_style = this_style
-                last_style = this_style
-                spread_style = this_style
-                name_style = this_style
-                # logger.debug(f"{early = }, {timely = }, {tardy = }: {this_style = }")
-
-                # Format each part with fixed width
-                tag_formatted = f"  {tag}  "          # 7 spaces for tag
-                next_formatted = f"  {next_date: ^8}"  # 10 spaces for next date
-                if "±" in interval:
-                    iparts = interval.split("±")
-                    spread_formatted = f"  {iparts[0]: >5}±{iparts[1]: <5}"
+            current = line_number > 0 and is_current_row(line_number)
+            if line_number not in cache:
+                row = model.row(line_number)
+                if row:
+                    cache[line_number] = self.row_fragments(row, now)
                 else:
-                    spread_formatted = f"  {interval: ^11}"
-                last_formatted = f"  {last_date: ^8}"
-                # Add the styled parts to the tokens list
-                tokens.append((list_style.get('tag', ''), tag_formatted))
-                tokens.append((name_style, tracker_name))
-                tokens.append((next_style, next_formatted))
-                tokens.append((spread_style, spread_formatted))
-                tokens.append((last_style, last_formatted))
-            elif banner_regex.match(line):
-                # use tracker style to avoid the highlight or list style to apply the highlight
-                tokens.append((tracker_style.get('banner', ''), line))
-                # tokens.append((list_style.get('banner', ''), line))
-            else:
-                tokens.append((list_style.get('default', ''), line))
-            # logger.debug(f"tokens: {tokens}")
-            return tokens
+                    cache[line_number] = self.line_fragments(lines[line_number], width)
+            return cache[line_number][current]
 
         return get_line_tokens
 
+    @staticmethod
+    def row_class(bounds, next_date: str, now: str) -> str:
+        early, timely, tardy = bounds
+        if early and timely and tardy:
+            if now < early:
+                return 'next-cold'
+            if now < timely:
+                return 'next-cool'
+            if now < tardy:
+                return 'next-warm'
+            return 'next-hot'
+        if next_date != "~" and next_date > now:
+            return 'next-cool'
+        return 'default'
+
+    @classmethod
+    def row_fragments(cls, row, now: str):
+        bounds, next_date, (tag, name, next, spread, last) = row
+        style_class = cls.row_class(bounds, next_date, now)
+        return tuple(
+            [
+                (list_style.get('tag', ''), tag),
+                (list_style.get(style_class, ''), name),
+                (list_style.get(style_class, ''), next),
+                (list_style.get(style_class, ''), spread),
+                (list_style.get(style_class, ''), last),
+            ]
+            for list_style in (tracker_style, highlight_style)
+        )
+
+    @staticmethod
+    def line_fragments(line: str, width: int):
+        if banner_regex.match(line):
+            # use tracker style to avoid the highlight
+            banner = [(tracker_style.get('banner', ''), line)]
+            return banner, banner
+        return (
+            [(tracker_style.get('default', ''), line)],
+            [(highlight_style.get('default', ''), f"{line:<{width+1}}")],
+        )
+
     @staticmethod
     def _parse_date(date_str):
         return datetime.strptime(date_str, "%y-%m-%d")
@@ -1326,29 +2050,87 @@ style = Style.from_dict({
     'status-window': f'bg:#396060 {NAMED_COLORS["White"]}',
 })
 
-def check_alarms():
-    """Periodic task to check alarms."""
-    today = (datetime.now()-timedelta(days=1)).strftime("%y-%m-%d")
-    while True:
-        f = freq  # Interval (e.g., 6, 12, 30, 60 seconds)
-        s = int(datetime.now().second)
-        n = s % f
-        w = f if n == 0 else f - n
-        time.sleep(w)  # Wait for the next interval
-        ct = datetime.now()
-        current_time = format_statustime(ct, freq)
-        message = f"{current_time}"
-        update_status(message)
-        newday = ct.strftime("%y-%m-%d")
-        if newday != today:
-            logger.info(f"new day: {newday}")
-            today = newday
-            cleanup_old_logs()
-            rotate_backups(trf_home, logger)
-
-def start_periodic_checks():
-    """Start the periodic check for alarms in a separate thread."""
-    threading.Thread(target=check_alarms, daemon=True).start()
+class RepaintScheduler:
+    """
+    Repaint the status clock once a minute and the tracker list only when
+    the date crosses an early, timely or tardy bound of a listed tracker,
+    the only times a row changes colour. The bounds are dates, so crossings
+    can only happen at midnight and the minute tick checks the heap of the
+    upcoming ones then. Runs as a task in the application's event loop.
+    """
+
+    def __init__(self):
+        self.crossings = []  # heap of '%y-%m-%d' bounds after today
+        self.today = datetime.now().strftime("%y-%m-%d")
+
+    def set_crossings(self, times):
+        self.crossings = [
+            bound for bounds in times for bound in bounds if bound > self.today
+        ]
+        heapq.heapify(self.crossings)
+
+    def new_day(self, today: str) -> bool:
+        """Set today and return True if any bound was crossed."""
+        self.today = today
+        crossed = False
+        while self.crossings and self.crossings[0] <= today:
+            heapq.heappop(self.crossings)
+            crossed = True
+        return crossed
+
+    async def run(self):
+        schedule_maintenance()
+        while True:
+            now = datetime.now()
+            await asyncio.sleep(60 - now.second - now.microsecond / 1_000_000)
+            now = datetime.now()
+            today = now.strftime("%y-%m-%d")
+            if today != self.today:
+                logger.info(f"new day: {today}")
+                if self.new_day(today):
+                    tracker_lexer.crossed += 1
+                schedule_maintenance()
+            update_status(format_statustime(now))
+            # not in a dialog, which may be about to change a tracker
+            if mode == 'main' and display_area.lexer is tracker_lexer and tracker_manager.sync():
+                # another client has changed the trackers that are listed
+                list_trackers()
+
+scheduler = RepaintScheduler()
+
+def schedule_maintenance():
+    """
+    Queue the daily jobs on the maintenance worker, which runs them in turn
+    so the pack never starts while the backup is still reading trf.fs.
+    """
+    from .backup import pack_backed_up, pack_storage, rotate_backups
+    maintenance.submit('logs', cleanup_old_logs)
+    # the backups are of trf_home's trf.fs and a ZEO server's storage is
+    # packed by its own process, e.g., with zeopack, so both are only for
+    # a FileStorage opened here
+    backed_up = storage_spec.is_file(db_path)
+    if backed_up:
+        # only the bytes already committed
+        maintenance.submit(
+            'backup', rotate_backups, trf_home, logger, tracker_manager.storage.getSize()
+            )
+    days = tracker_manager.settings.get('pack_days', 7)
+    if days >= 0 and backed_up:
+        # a pack ends the backup chain, so not every day
+        maintenance.submit('pack', pack_backed_up, tracker_manager.db, trf_home, days, logger)
+    elif days >= 0 and storage_spec.is_file():
+        maintenance.submit('pack', pack_storage, tracker_manager.db, storage_spec.path, days, logger)
+
+def start_scheduler():
+    """Start the scheduler in the event loop of app once it is running."""
+    app.create_background_task(scheduler.run())
+
+def format_spread(plus_or_minus: str) -> str:
+    """Align the average interval ± spread column on the ±."""
+    if PLUS_OR_MINUS in plus_or_minus:
+        average, spread = plus_or_minus.split(PLUS_OR_MINUS)
+        return f"  {average: >5}{PLUS_OR_MINUS}{spread: <5}"
+    return f"  {plus_or_minus: ^11}"
 
 def center_text(text, width: int = shutil.get_terminal_size()[0] - 2):
     if len(text) >= width:
@@ -1366,33 +2148,26 @@ selected_id = None
 
 # Tracker mapping example
 # UI Components
-menu_text = "menu  a)dd d)elete e)dit i)nfo l)ist r)ecord s)how ^q)uit"
-menu_container = Window(content=FormattedTextControl(text=menu_text), height=1, style="class:menu-bar")
-
-search_field = SearchToolbar(
-    text_if_not_searching=[
-    ('class:not-searching', "Press '/' to start searching.")
-    ],
-    ignore_case=True,
-    )
+
 
 def update_status(new_message):
-    status_control.text = new_message
+    status_clock[0] = new_message
     app.invalidate()  # Request a UI refresh
 
+def get_status_text():
+    job = maintenance.status()
+    return f"{status_clock[0]}  {job}" if job else status_clock[0]
+
+# app is created by build_ui() in main()
+app = None
+
+maintenance = MaintenanceWorker(logger, on_change=lambda: app and app.invalidate())
+
 tracker_lexer = TrackerLexer()
 info_lexer = InfoLexer()
 help_lexer = HelpLexer()
 default_lexer = DefaultLexer()
 
-display_area = TextArea(
-    text="",
-    read_only=True,
-    search_field=search_field,
-    lexer=tracker_lexer,
-    focus_on_click=True,
-    scrollbar=True
-    )
 
 def set_lexer(document_type: str):
     if document_type == 'list':
@@ -1404,78 +2179,133 @@ def set_lexer(document_type: str):
     else:
         display_area.lexer = default_lexer
 
-input_area = TextArea(
-    focusable=True,
-    multiline=True,
-    prompt='> ',
-    scrollbar=True,
-    height=D(preferred=5, max=10),  # Set preferred and max height
-    style="class:input-area"
-)
-
-dynamic_input_area = DynamicContainer(lambda: input_area)
+class TrackerListControl(UIControl):
+    """
+    The tracker list as a single scroll through every tracker in the current
+    order, an alternative to the pages of 26. Each render takes just the
+    rows that fit in the window, a slice of the sort index, and formats and
+    lexes only those, so scrolling costs the same whatever the number of
+    trackers. The rows in the window are tagged a to z from the top.
+    """
 
-input_container = ConditionalContainer(
-    content=dynamic_input_area,
-    filter=Condition(lambda: dialog_visible[0])
-)
+    def __init__(self):
+        self.cursor = 0  # position of the cursor row in the ordering
+        self.top = 0  # position of the first row in the window
+        self.rows = 26  # rows in the window below the banner
+        self.visible = []  # doc_ids of the rows in the window
+        self.fragments = {}  # (doc_id, tag) -> (plain, highlighted)
+        self.day = ''
+        self.kb = KeyBindings()
+        for key, delta in (('up', -1), ('down', 1), ('pageup', None), ('pagedown', None)):
+            self.kb.add(key)(lambda event, key=key, delta=delta: self.move(
+                delta if delta else (self.rows if key == 'pagedown' else -self.rows)))
+        self.kb.add('home')(lambda event: self.move_to(0))
+        self.kb.add('end')(lambda event: self.move_to(len(tracker_manager.get_indexes()) - 1))
+
+    def is_focusable(self):
+        return True
+
+    def get_key_bindings(self):
+        return self.kb
+
+    def refresh(self):
+        """
+        Forget the formatted rows since the trackers or their order may have
+        changed and move the cursor to wherever the selected tracker now is.
+        """
+        self.fragments = {}
+        if tracker_manager.selected_id is not None:
+            position = tracker_manager.get_position(tracker_manager.selected_id)
+            if position is not None:
+                self.cursor = position
+
+    def move_to(self, position: int):
+        self.cursor = max(0, min(position, len(tracker_manager.get_indexes()) - 1))
+        tracker_manager.selected_id = None
+
+    def move(self, delta: int):
+        self.move_to(self.cursor + delta)
+
+    def selected_id(self):
+        reverse = tracker_manager.sort_by == 'modified'
+        ids = tracker_manager.get_indexes().page(
+            tracker_manager.sort_by, self.cursor, self.cursor + 1, reverse)
+        return ids[0] if ids else None
+
+    def create_content(self, width, height):
+        indexes = tracker_manager.get_indexes()
+        n = len(indexes)
+        self.rows = max(height - 1, 1)
+        self.cursor = max(0, min(self.cursor, n - 1))
+        if self.cursor < self.top:
+            self.top = self.cursor
+        elif self.cursor >= self.top + self.rows:
+            self.top = self.cursor - self.rows + 1
+        self.top = max(0, min(self.top, n - self.rows))
+        sort_by = tracker_manager.sort_by
+        self.visible = indexes.page(sort_by, self.top, self.top + self.rows, sort_by == 'modified')
+        set_pages(f"{self.cursor + 1}/{n}: {sort_by + DOWN if sort_by == 'modified' else sort_by + UP}")
+
+        today = datetime.now().strftime("%y-%m-%d")
+        if today != self.day or len(self.fragments) > 4 * self.rows:
+            self.day = today
+            self.fragments = {}
+        name_width = tracker_manager.name_width(width)
+        banner = [(tracker_style.get('banner', ''), tracker_manager.list_banner(name_width))]
+        cursor_row = self.cursor - self.top + 1
+
+        def get_line(i):
+            if i == 0:
+                return banner
+            tag = tag_keys[i - 1] if i <= len(tag_keys) else ' '
+            key = (self.visible[i - 1], tag)
+            if key not in self.fragments:
+                tracker = tracker_manager.trackers.get(key[0])
+                if tracker is None:
+                    return []
+                _, row = tracker_manager.format_row(tracker, tag, name_width)
+                self.fragments[key] = TrackerLexer.row_fragments(row, today)
+            return self.fragments[key][i == cursor_row]
+
+        return UIContent(
+            get_line=get_line,
+            line_count=len(self.visible) + 1,
+            cursor_position=Point(x=0, y=cursor_row),
+            show_cursor=False,
+        )
 
-# Define the message control and message window
-message_control = FormattedTextControl(text="")
+    def mouse_handler(self, mouse_event):
+        if mouse_event.event_type == MouseEventType.MOUSE_UP and mouse_event.position.y > 0:
+            self.move_to(self.top + mouse_event.position.y - 1)
+        elif mouse_event.event_type == MouseEventType.SCROLL_UP:
+            self.move(-3)
+        elif mouse_event.event_type == MouseEventType.SCROLL_DOWN:
+            self.move(3)
+        else:
+            return NotImplemented
+        return None
 
-def calculate_height():
-    message = message_control.text  # Get the current message
-    lines = message.count('\n')   # Count lines (including wrapped lines)
-    return D(preferred=lines, max=lines+1)
+scroll_view = [False]  # show the single scroll list instead of pages
+showing_scroll = Condition(lambda: scroll_view[0] and display_area.lexer is tracker_lexer)
 
-message_window = DynamicContainer(
-    lambda: Window(
-        content=message_control,
-        height=calculate_height(),  # Use dynamic height based on content
-        style="class:message-window"
-    )
-)
+def focus_list():
+    app.layout.focus(scroll_window if scroll_view[0] else display_area)
 
-message_container = ConditionalContainer(
-    content=message_window,
-    filter=Condition(lambda: message_visible[0])
-)
 
-dialog_area = HSplit(
-        [
-            message_window,
-            HorizontalLine(),
-            input_container,
-        ]
-    )
 
-dialog_container = ConditionalContainer(
-    content=dialog_area,
-    filter=Condition(lambda: dialog_visible[0])
-)
 
-status_control = FormattedTextControl(text=f"{format_statustime(datetime.now(), freq)}")
-status_window = Window(content=status_control, height=1, style="class:status-window", width=D(preferred=20), align=WindowAlign.LEFT)
+def calculate_height():
+    message = message_control.text  # Get the current message
+    lines = message.count('\n')   # Count lines (including wrapped lines)
+    return D(preferred=lines, max=lines+1)
 
-page_control = FormattedTextControl(text="")
-page_window = Window(content=page_control, height=1, style="class:status-window", width=D(preferred=20), align=WindowAlign.CENTER)
 
-right_control = FormattedTextControl(text="menu ")
-right_window = Window(content=right_control, height=1, style="class:status-window", width=D(preferred=20), align=WindowAlign.RIGHT)
 
 
 def set_pages(txt: str):
     page_control.text = f"{txt} "
 
 
-status_area = VSplit(
-    [
-        status_window,
-        page_window,
-        right_window
-    ],
-    height=1,
-)
 
 def get_row_col():
     row_number = display_area.document.cursor_position_row
@@ -1490,7 +2320,7 @@ def get_page_row():
 
 def get_tracker_from_row()->int:
     page, row = get_page_row()
-    id = tracker_manager.row_to_id.get((page, row), None)
+    id = tracker_manager.page_model.id_for_row(row)
     logger.debug(f"{page = }, {row = } => {id = }")
     if id is not None:
         tracker = tracker_manager.get_tracker_from_id(id)
@@ -1502,6 +2332,7 @@ def get_tracker_from_tag(tag: str):
     return tracker_manager.get_tracker_from_tag(tag)
 
 def read_readme():
+    import importlib.resources
     try:
         content = None
         with importlib.resources.open_text('trf', 'README.txt') as readme_file:
@@ -1510,14 +2341,6 @@ def read_readme():
     except FileNotFoundError:
         return "README.txt file not found."
 
-body = HSplit([
-    # menu_container,
-    display_area,
-    status_area,
-    message_container, # Conditional Message Area
-    dialog_container,  # Conditional Input Area
-    ConditionalContainer(content=search_field, filter=Condition(lambda: is_active_mode('search'))),
-])
 
 # Boolean to track the visibility of the float
 float_visible = [False]  # Use a list so we can modify it within a closure
@@ -1533,9 +2356,6 @@ def display_float(event):
 screen_width, screen_height = shutil.get_terminal_size()
 
 
-kb = KeyBindings()
-
-@kb.add('c-q')
 def exit_app(*event):
     """Exit the application."""
     app.exit()
@@ -1636,6 +2456,10 @@ def sort_by(event=None):
     close_dialog(changed=True)
 
 
+def show_agenda(*event):
+    display_info(tracker_manager.agenda())
+
+
 def display_info(msg: str, doc_type: str = 'info'):
     display_message(msg, 'info')
     set_mode('info')
@@ -1661,17 +2485,85 @@ def refresh_info(*event):
 
 def next_page(*event):
     logger.debug("next page")
+    if scroll_view[0]:
+        scroll_control.move(scroll_control.rows)
+        return
     tracker_manager.next_page()
     list_trackers()
 
 def previous_page(*event):
     logger.debug("previous page")
+    if scroll_view[0]:
+        scroll_control.move(-scroll_control.rows)
+        return
     tracker_manager.previous_page()
     list_trackers()
 
+def toggle_view(*event):
+    """Switch between pages of 26 trackers and a single scroll through all of them."""
+    if scroll_view[0]:
+        position = scroll_control.cursor
+        tracker_manager.selected_id = scroll_control.selected_id()
+        tracker_manager.active_page = position // 26
+    else:
+        tracker = tracker_manager.get_tracker_from_row()
+        position = tracker_manager.get_position(tracker.doc_id) if tracker else None
+        scroll_control.cursor = tracker_manager.active_page * 26 if position is None else position
+    scroll_view[0] = not scroll_view[0]
+    list_trackers()
+
+def jump(event=None):
+    if mode == 'main':
+        message_control.text = wrap('Jump to the first tracker whose subject is not before the one entered.\nPress "Ctrl-S" to jump or "escape" to cancel.', 0)
+        app.layout.focus(input_area)
+        set_mode('jump')
+    elif mode == 'jump':
+        name = input_area.text.strip()
+        if name:
+            tracker_manager.jump_to_name(name)
+        close_dialog(changed=bool(name))
+    else:
+        return
+
+def parse_eta(text: str):
+    """Return the η in text, an int where possible, or raise ValueError."""
+    # by regex since the module's float, the shortcuts float, hides the builtin
+    m = re.fullmatch(r'(\d+)(?:\.(\d+))?', text)
+    if not m or not int(m[1] + (m[2] or '')):
+        raise ValueError(f"not a positive number: {text}")
+    whole, fraction = m.groups()
+    if not fraction or not int(fraction):
+        return int(whole)
+    return int(whole) + int(fraction) / 10 ** len(fraction)
+
+def etas(event=None):
+    if mode == 'main':
+        message_control.text = wrap(f'Enter one or more values of {ETA}, e.g., "2" or "2 1 3", to list the trackers with. The first sets the colours and the early and tardy bounds and the others are shown as columns of {ETA} × spread for comparison. Leave empty for the {ETA} setting. Nothing is saved.\nPress "Ctrl-S" to list or "escape" to cancel.', 0)
+        input_area.text = ' '.join(f"{n:g}" for n in tracker_manager.etas or [])
+        app.layout.focus(input_area)
+        set_mode('etas')
+    elif mode == 'etas':
+        try:
+            values = [parse_eta(x) for x in input_area.text.replace(',', ' ').split()]
+        except ValueError:
+            message_control.text = wrap(f'Invalid {ETA}: "{input_area.text.strip()}". Enter positive numbers separated by spaces.', 0)
+            return
+        tracker_manager.set_etas(values)
+        close_dialog(changed=True)
+    else:
+        return
+
 def list_trackers(*event):
     """List trackers."""
     set_mode('main')
+    # with the changes other clients have committed
+    tracker_manager.sync()
+    if scroll_view[0]:
+        set_lexer('list')
+        scroll_control.refresh()
+        app.layout.focus(scroll_window)
+        app.invalidate()
+        return
     display_message(tracker_manager.list_trackers(), 'list')
     logger.debug(f"in list_trackers: {tracker_manager.get_tracker_from_id(tracker_manager.selected_id)= }")
     logger.debug(f"in list_trackers: {tracker_manager.get_row_from_id(tracker_manager.selected_id)= }")
@@ -1699,6 +2591,9 @@ def toggle_inspect(*event):
 
 
 def first_page(*event):
+    if scroll_view[0]:
+        scroll_control.move_to(0)
+        return
     tracker_manager.first_page()
     list_trackers()
 
@@ -1709,6 +2604,7 @@ def do_restore_defaults(*event):
 def save_to_clipboard(*event):
     # Access the content of the TextArea
     if display_area.text:
+        import pyperclip
         pyperclip.copy(display_area.text)
         display_info('display copied to system clipboard', 'info')
 
@@ -1723,7 +2619,7 @@ def close_dialog(event=None, changed=False):
     if changed:
         list_trackers()
     set_mode('main')
-    app.layout.focus(display_area)
+    focus_list()
 
 def cancel(event=None):
     close_dialog(event, False)
@@ -1746,11 +2642,23 @@ def settings(event=None):
         if yaml_string:
             yaml_input = StringIO(yaml_string)
             updated_settings = yaml.load(yaml_input)
-            tracker_manager.settings.update(updated_settings)
-            transaction.commit()
-            tracker_manager.save_data()
+            before = {k: v for k, v in tracker_manager.settings.items() if k != ETA}
+            def update():
+                # from the root afresh on each attempt, another client may
+                # have committed
+                tracker_manager.settings = tracker_manager.root['settings']
+                tracker_manager.settings.update(updated_settings)
+                # settings is a plain mapping pickled with the root, which no
+                # longer changes as a side effect of save_data
+                tracker_manager.root._p_changed = True
+            tracker_manager.save_data(update)
             logger.debug(f"updated settings:\n{yaml_string}")
-            tracker_manager.refresh_info()
+            if before == {k: v for k, v in tracker_manager.settings.items() if k != ETA}:
+                # at most η changed, which leaves the statistics as they are
+                tracker_manager.set_etas([])
+            else:
+                tracker_manager.etas = None
+                tracker_manager.refresh_info()
             changed = True
         close_dialog(changed=changed)
 
@@ -1773,8 +2681,11 @@ Enter the subject of the new tracker. Optionally append a comma and the datetime
             interval = parts[2] if len(parts) > 2 else None
             if name:
                 doc_id = tracker_manager.add_tracker(name)
-                changed = True
-                logger.debug(f"added tracker: {name}")
+                if doc_id is None:
+                    msg.append("The new tracker could not be saved.")
+                else:
+                    changed = True
+                    logger.debug(f"added tracker: {name}")
             else:
                 msg.append("No name provided.")
             if date and not msg:
@@ -1908,6 +2819,9 @@ def move_to_page(event):
     if not page and page in range(1, 10):
         return
     logger.debug(f"got {page = }, {type(page) = }")
+    if scroll_view[0]:
+        scroll_control.move_to((int(page)-1) * 26)
+        return
 
     # tracker_manager.set_active_page(int(page)-1)
     tracker_manager.set_page(int(page)-1)
@@ -1920,6 +2834,10 @@ def move_to_tag(event):
     if not tag:
         return
     row = list(string.ascii_lowercase).index(tag) + 1
+    if scroll_view[0]:
+        if row <= len(scroll_control.visible):
+            scroll_control.move_to(scroll_control.top + row - 1)
+        return
     display_area.buffer.cursor_position = (
         display_area.buffer.document.translate_row_col_to_index(row, 0)
     )
@@ -1943,6 +2861,10 @@ def set_mode_bindings():
             ('R', rename),
             ('H', history),
             ('D', delete),
+            ('A', show_agenda),
+            ('V', toggle_view),
+            ('J', jump),
+            ('E', etas),
             ('space', toggle_inspect),
             ('left', previous_page),
             ('right', next_page),
@@ -1980,6 +2902,12 @@ def set_mode_bindings():
             'c-s': history,
             # '.': toggle_shortcuts,
             },
+        'jump' : {
+            'c-s': jump,
+            },
+        'etas' : {
+            'c-s': etas,
+            },
         'settings': {
             'c-s': settings,
             # '.': toggle_shortcuts,
@@ -2029,35 +2957,12 @@ def set_bindings():
 
 
 
-    for current_mode in ['new', 'complete', 'rename', 'history', 'handle_sort', 'delete', 'settings']:
+    for current_mode in ['new', 'complete', 'rename', 'history', 'jump', 'etas', 'handle_sort', 'delete', 'settings']:
         kb.add('escape', filter=Condition(lambda m=current_mode: is_active_mode(m)), eager=True)(cancel)
 
     # log_key_bindings(kb)
 
 
-menu_items=[
-    MenuItem(
-        "☰ task tracker",
-        children=[
-            MenuItem('F1 toggle menu', handler=menu),
-            MenuItem('F2 about trf', handler=do_about),
-            MenuItem('F3 edit settings', handler=settings),
-            MenuItem('F4 readme', handler=do_help),
-            MenuItem('.  show/hide shortcuts', handler=toggle_shortcuts),
-            MenuItem('^q exit', handler=exit_app),
-
-        ]
-    ),
-    # Label(text="trf: task record and forecast", style="class:menu-title"),
-    # Label(text="☰ task tracker", style="class:menu-title"),
-]
-
-# Create a MenuContainer using the custom menu bar
-root_container = MenuContainer(
-    body=body,
-    menu_items=menu_items,
-    floats=[]
-    )
 
 dialog_visible = [False]
 message_visable = [False]
@@ -2068,7 +2973,7 @@ def set_mode(active_mode):
     float_visible[0] = False
     right_control.text = f"{mode} "
     dialog_visible[0] = (
-        mode in ['new', 'complete', 'rename', 'history', 'new', 'settings']
+        mode in ['new', 'complete', 'rename', 'history', 'jump', 'etas', 'new', 'settings']
         )
     message_visible[0] = (
         mode in ['delete', 'delete', 'sort', 'handle_sort']
@@ -2105,32 +3010,19 @@ def set_mode(active_mode):
     logger.debug(f"dialog_visible: {dialog_visible}; message_visible: {message_visible}")
     # log_key_bindings(kb)
 
-@kb.add('/', filter=Condition(lambda: mode not in ['new', 'complete', 'rename', 'history', 'settings']))
 def search_forward(event):
     # Your custom logic to set search mode
     logger.debug("setting search mode")
     set_mode('search')
     start_search(display_area.control)
 
-@kb.add('?', filter=Condition(lambda: mode not in ['new', 'complete', 'rename', 'history', 'settings']))
 def search_backward(event):
     # Your custom logic to set search mode
     logger.debug("setting search mode")
     set_mode('search')
     start_search(display_area.control, SearchDirection.BACKWARD)
 
-set_mode('main')
-
-set_bindings()
 
-status_area = VSplit(
-    [
-        status_window,
-        page_window,
-        right_window
-    ],
-    height=1,
-)
 
 def display_message(message: str, document_type: str = 'list'):
     """Log messages to the text area."""
@@ -2162,45 +3054,50 @@ def display_message_after_delay(message: str, seconds: int = 2):
     # app.invalidate()
 
 
-@kb.add('c-e')
 def add_example_trackers(*event):
     del_example_trackers()
+    from lorem.text import TextLorem
     lm = TextLorem(srange=(2,3))
-    import random
     today = datetime.now().replace(microsecond=0,second=0,minute=0,hour=0)
-    for i in range(1,49): # create 48 trackers
-        name = f"{lm.sentence()[:-1]}"
-        doc_id = 1000 + i # make sure id's don't conflict with existing trackers
-        tracker = Tracker(name, doc_id)
-        # Add the tracker to the trackers dictionary
-        tracker_manager.trackers[doc_id] = tracker
-        # intervals
-        due = today - timedelta(days=random.choice([-5, 0, 5, 10]))
-        avg =timedelta(days=random.choice([7, 10, 14]), hours=random.choice([8, 12, 16, 20]))
-        mad = avg / random.choice([12, 8, 6])
-        if i < 41:
-            completions = [due-2*avg, due-avg-mad, due]
-        elif i < 44:
-            completions = [due-avg-mad, due]
-        elif i < 47:
-            completions = [due]
-        else:
-            completions = []
-
-        for comp in completions:
-            hours = random.choice([0, 0, 0, 0, 0, 0, 12, 24, 36])
-            sign = random.choice([-1, 1])
-            if hours != 0:
-                orig_comp = comp
-                comp = (comp + timedelta(hours=hours), -timedelta(hours=hours)) if sign == 1 else (comp - timedelta(hours=hours), timedelta(hours=hours))
-                logger.debug(f"comp: {comp}; orig_comp: {orig_comp}; sign: {sign}; hours: {hours}")
-            tracker_manager.trackers[doc_id].record_completion(comp)
-        tracker_manager.save_data()
-        tracker_manager.trackers[doc_id].compute_info()
+    # run again should the commit conflict, see save_batch
+    def add():
+        for i in range(1,49): # create 48 trackers
+            # one tracker that fails is rolled back alone
+            with tracker_manager.savepoint():
+                name = f"{lm.sentence()[:-1]}"
+                doc_id = 1000 + i # make sure id's don't conflict with existing trackers
+                tracker = Tracker(name, doc_id)
+                # Add the tracker to the trackers dictionary
+                tracker_manager.trackers[doc_id] = tracker
+                # intervals
+                due = today - timedelta(days=random.choice([-5, 0, 5, 10]))
+                avg =timedelta(days=random.choice([7, 10, 14]), hours=random.choice([8, 12, 16, 20]))
+                mad = avg / random.choice([12, 8, 6])
+                if i < 41:
+                    completions = [due-2*avg, due-avg-mad, due]
+                elif i < 44:
+                    completions = [due-avg-mad, due]
+                elif i < 47:
+                    completions = [due]
+                else:
+                    completions = []
+
+                for comp in completions:
+                    hours = random.choice([0, 0, 0, 0, 0, 0, 12, 24, 36])
+                    sign = random.choice([-1, 1])
+                    if hours != 0:
+                        orig_comp = comp
+                        comp = (comp + timedelta(hours=hours), -timedelta(hours=hours)) if sign == 1 else (comp - timedelta(hours=hours), timedelta(hours=hours))
+                        logger.debug(f"comp: {comp}; orig_comp: {orig_comp}; sign: {sign}; hours: {hours}")
+                    tracker_manager.trackers[doc_id].record_completion(comp)
+                tracker_manager.reindex(doc_id)
+                tracker_manager.save_data()
+    if not tracker_manager.save_batch(add):
+        display_message("The example trackers could not be saved.", 'error')
+        return
     list_trackers()
 
 
-@kb.add('c-t')
 def add_readme_trackers(*event):
     header = """\
 # Automatically generated by trf.add_readme_trackers()
@@ -2222,86 +3119,256 @@ other_replacements = {
         'one completion': [0, 1],
         'zero completions': [0, 0]
         }
-    doc_id = 1000
-    for name in names.keys(): # create 6 trackers
-        doc_id += 1
-        tracker = Tracker(name, doc_id)
-        # Add the tracker to the trackers dictionary
-        tracker_manager.trackers[doc_id] = tracker
-        days, completions = names[name]
-        # intervals
-        due = today - timedelta(days=days)
-        avg = timedelta(days=random.choice([6, 7]), hours=random.choice([8, 12, 16, 20]))
-        mad = timedelta(days = 1, hours = random.choice([4, 8, 12]))
-        if completions == 3:
-            completions = [due-2*avg, due-avg-mad, due]
-        elif completions == 2:
-            completions = [due-avg-mad, due]
-        elif completions == 1:
-            completions = [due]
-        else:
-            completions = []
-
-        for comp in completions:
-            hours = random.choice([0, 0, 0, 0, 0, 6, 9, 12])
-            sign = random.choice([-1, 1])
-            if hours != 0:
-                orig_comp = comp
-                comp = (comp + timedelta(hours=hours), -timedelta(hours=hours)) if sign == 1 else (comp - timedelta(hours=hours), timedelta(hours=hours))
-                logger.debug(f"comp: {comp}; orig_comp: {orig_comp}; sign: {sign}; hours: {hours}")
-            tracker_manager.trackers[doc_id].record_completion(comp)
-        tracker_manager.save_data()
-        tracker_manager.trackers[doc_id].compute_info()
+    # run again should the commit conflict, see save_batch
+    def add():
+        doc_id = 1000
+        for name in names.keys(): # create 6 trackers
+            # one tracker that fails is rolled back alone
+            with tracker_manager.savepoint():
+                doc_id += 1
+                tracker = Tracker(name, doc_id)
+                # Add the tracker to the trackers dictionary
+                tracker_manager.trackers[doc_id] = tracker
+                days, completions = names[name]
+                # intervals
+                due = today - timedelta(days=days)
+                avg = timedelta(days=random.choice([6, 7]), hours=random.choice([8, 12, 16, 20]))
+                mad = timedelta(days = 1, hours = random.choice([4, 8, 12]))
+                if completions == 3:
+                    completions = [due-2*avg, due-avg-mad, due]
+                elif completions == 2:
+                    completions = [due-avg-mad, due]
+                elif completions == 1:
+                    completions = [due]
+                else:
+                    completions = []
+
+                for comp in completions:
+                    hours = random.choice([0, 0, 0, 0, 0, 6, 9, 12])
+                    sign = random.choice([-1, 1])
+                    if hours != 0:
+                        orig_comp = comp
+                        comp = (comp + timedelta(hours=hours), -timedelta(hours=hours)) if sign == 1 else (comp - timedelta(hours=hours), timedelta(hours=hours))
+                        logger.debug(f"comp: {comp}; orig_comp: {orig_comp}; sign: {sign}; hours: {hours}")
+                    tracker_manager.trackers[doc_id].record_completion(comp)
+                tracker_manager.reindex(doc_id)
+                tracker_manager.save_data()
+    if not tracker_manager.save_batch(add):
+        display_message("The readme trackers could not be saved.", 'error')
+        return
     list_trackers()
 
 
-@kb.add('c-r')
 def del_example_trackers(*event):
-    remove = []
-    for id, tracker in tracker_manager.trackers.items():
-        # if tracker.name.startswith('#'):
-        if tracker.doc_id >= 1000:
-            remove.append(id)
-    for id in remove:
-        tracker_manager.delete_tracker(id)
+    # run again should the commit conflict, see save_batch
+    def delete():
+        remove = []
+        for id, tracker in tracker_manager.trackers.items():
+            # if tracker.name.startswith('#'):
+            if tracker.doc_id >= 1000:
+                remove.append(id)
+        for id in remove:
+            tracker_manager.delete_tracker(id)
+    if not tracker_manager.save_batch(delete):
+        display_message("The example trackers could not be deleted.", 'error')
+        return
     list_trackers()
 
 
-def set_pages(txt: str):
-    page_control.text = f"{txt} "
 
 
-status_area = VSplit(
-    [
-        status_window,
-        page_window,
-        right_window
-    ],
-    height=1,
-)
 
-layout = Layout(root_container)
+def build_ui():
+    """
+    Create the widgets, key bindings and Application. This is done by main()
+    rather than on import so that importing trf for, e.g., Tracker.parse_td
+    costs neither the widgets nor a database.
+    """
+    global menu_text, menu_container, search_field, display_area, \
+        scroll_control, scroll_window, input_area, dynamic_input_area, \
+        input_container, message_control, message_window, \
+        message_container, dialog_area, dialog_container, status_clock, \
+        status_control, status_window, page_control, page_window, \
+        right_control, right_window, status_area, body, kb, menu_items, \
+        root_container, layout, app
+    menu_text = "menu  a)dd d)elete e)dit i)nfo l)ist r)ecord s)how ^q)uit"
+    menu_container = Window(content=FormattedTextControl(text=menu_text), height=1, style="class:menu-bar")
+
+    search_field = SearchToolbar(
+        text_if_not_searching=[
+        ('class:not-searching', "Press '/' to start searching.")
+        ],
+        ignore_case=True,
+        )
+
+    display_area = TextArea(
+        text="",
+        read_only=True,
+        search_field=search_field,
+        lexer=tracker_lexer,
+        focus_on_click=True,
+        scrollbar=True
+        )
+
+    scroll_control = TrackerListControl()
+    scroll_window = Window(content=scroll_control, wrap_lines=False)
+
+    input_area = TextArea(
+        focusable=True,
+        multiline=True,
+        prompt='> ',
+        scrollbar=True,
+        height=D(preferred=5, max=10),  # Set preferred and max height
+        style="class:input-area"
+    )
+
+    dynamic_input_area = DynamicContainer(lambda: input_area)
+
+    input_container = ConditionalContainer(
+        content=dynamic_input_area,
+        filter=Condition(lambda: dialog_visible[0])
+    )
+
+    # Define the message control and message window
+    message_control = FormattedTextControl(text="")
+
+    message_window = DynamicContainer(
+        lambda: Window(
+            content=message_control,
+            height=calculate_height(),  # Use dynamic height based on content
+            style="class:message-window"
+        )
+    )
+
+    message_container = ConditionalContainer(
+        content=message_window,
+        filter=Condition(lambda: message_visible[0])
+    )
+
+    dialog_area = HSplit(
+            [
+                message_window,
+                HorizontalLine(),
+                input_container,
+            ]
+        )
+
+    dialog_container = ConditionalContainer(
+        content=dialog_area,
+        filter=Condition(lambda: dialog_visible[0])
+    )
+
+    status_clock = [format_statustime(datetime.now())]
+    status_control = FormattedTextControl(text=get_status_text)
+    status_window = Window(content=status_control, height=1, style="class:status-window", width=D(preferred=20), align=WindowAlign.LEFT)
+
+    page_control = FormattedTextControl(text="")
+    page_window = Window(content=page_control, height=1, style="class:status-window", width=D(preferred=20), align=WindowAlign.CENTER)
+
+    right_control = FormattedTextControl(text="menu ")
+    right_window = Window(content=right_control, height=1, style="class:status-window", width=D(preferred=20), align=WindowAlign.RIGHT)
 
-app = Application(layout=layout, key_bindings=kb, full_screen=True, mouse_support=True, style=style)
+    status_area = VSplit(
+        [
+            status_window,
+            page_window,
+            right_window
+        ],
+        height=1,
+    )
 
-app.layout.focus(root_container.body)
+    body = HSplit([
+        # menu_container,
+        ConditionalContainer(content=display_area, filter=~showing_scroll),
+        ConditionalContainer(content=scroll_window, filter=showing_scroll),
+        status_area,
+        message_container, # Conditional Message Area
+        dialog_container,  # Conditional Input Area
+        ConditionalContainer(content=search_field, filter=Condition(lambda: is_active_mode('search'))),
+    ])
+
+    kb = KeyBindings()
+    menu_items=[
+        MenuItem(
+            "☰ task tracker",
+            children=[
+                MenuItem('F1 toggle menu', handler=menu),
+                MenuItem('F2 about trf', handler=do_about),
+                MenuItem('F3 edit settings', handler=settings),
+                MenuItem('F4 readme', handler=do_help),
+                MenuItem('.  show/hide shortcuts', handler=toggle_shortcuts),
+                MenuItem('^q exit', handler=exit_app),
+
+            ]
+        ),
+        # Label(text="trf: task record and forecast", style="class:menu-title"),
+        # Label(text="☰ task tracker", style="class:menu-title"),
+    ]
+
+    # Create a MenuContainer using the custom menu bar
+    root_container = MenuContainer(
+        body=body,
+        menu_items=menu_items,
+        floats=[]
+        )
+
+    kb.add('c-q')(exit_app)
+    kb.add('/', filter=Condition(lambda: mode not in ['new', 'complete', 'rename', 'history', 'jump', 'etas', 'settings'] and not showing_scroll()))(search_forward)
+    kb.add('?', filter=Condition(lambda: mode not in ['new', 'complete', 'rename', 'history', 'jump', 'etas', 'settings'] and not showing_scroll()))(search_backward)
+    kb.add('c-e')(add_example_trackers)
+    kb.add('c-t')(add_readme_trackers)
+    kb.add('c-r')(del_example_trackers)
+
+    set_mode('main')
+    set_bindings()
+
+    layout = Layout(root_container)
+    app = Application(layout=layout, key_bindings=kb, full_screen=True, mouse_support=True, style=style)
+    app.layout.focus(root_container.body)
 
 
 def main():
+    global trf_home, log_level, restore, backup_dir, db_path, storage_spec, \
+        tracker_manager
+    from .storage import StorageSpec
+
+    trf_home, log_level, restore, backup_dir, db_path, storage_uri = process_arguments()
+    setup_logging(trf_home, log_level, 7)
+    try:
+        storage_spec = StorageSpec(storage_uri, db_path)
+    except ValueError as e:
+        logger.error(str(e))
+        print(e, file=sys.stderr)
+        return
+    if restore:
+        if not storage_spec.is_file(db_path):
+            print(f"restore replaces {db_path} but the storage is {storage_spec}", file=sys.stderr)
+            return
+        from .backup import restore_from_backup
+        # the storage must not be open while its files are replaced
+        restore_from_backup(trf_home, logger)
+        return
+    try:
+        tracker_manager = TrackerManager(*init_db(db_path, storage_spec))
+    except Exception as e:
+        logger.error(f"Could not open {storage_spec}: {e!r}")
+        print(f"Could not open {storage_spec}: {e}", file=sys.stderr)
+        return
+    build_ui()
     try:
-        logger.info(f"Started TrackerManager with database file {db_path}")
+        logger.info(f"Started TrackerManager with {storage_spec}")
         display_text = tracker_manager.list_trackers()
         display_message(display_text)
-        start_periodic_checks()  # Start the periodic checks
-        app.run()
+        app.run(pre_run=start_scheduler)
     except Exception as e:
         logger.error(f"exception raised:\n{e}")
     else:
         logger.error("exited tracker")
     finally:
+        maintenance.shutdown()
         if tracker_manager:
             tracker_manager.close()
-            logger.info(f"Closed TrackerManager and database file {db_path}")
+            logger.info(f"Closed TrackerManager and {storage_spec}")
         else:
             logger.info("TrackerManager was not initialized")
 
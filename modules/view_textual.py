@@ -10,6 +10,7 @@ from textual.containers import Vertical
 from prompt_toolkit.styles.named_colors import NAMED_COLORS
 from rich.console import Console
 from rich.segment import Segment
+from rich.style import Style
 from rich.text import Text
 from textual.app import App, ComposeResult
 from textual.geometry import Size
@@ -17,6 +18,7 @@ from textual.reactive import reactive
 from textual.screen import Screen
 from textual.scroll_view import ScrollView
 from textual.strip import Strip
+from textual.widget import Widget
 from textual.widgets import Input
 from textual.widgets import Markdown
 import re
@@ -48,6 +50,11 @@ from .common import (
 HEADER_COLOR = NAMED_COLORS["LightSkyBlue"]
 TITLE_COLOR = NAMED_COLORS["Cornsilk"]
 
+# heatmap cell colors from no completions (0) to the busiest days (4)
+HEATMAP_COLORS = ["#3a3a3a", "#0e4429", "#006d32", "#26a641", "#39d353"]
+HEATMAP_CELL = "■ "
+WEEKDAY_LABELS = ["Mon", "", "Wed", "", "Fri", "", "Sun"]
+
 HelpTitle = f"GoalMate {VERSION}"
 HelpText = """\
 ### Views 
@@ -64,15 +71,19 @@ HelpText = """\
 - When list view is active:
     - **A**: Add a new goal.
     - **L**: Refresh the list of goals.
+    - **H**: Show a heatmap of the daily completions of all goals.
     - **a**-**z**: Show the details of the goal tagged with the corresponding letter.
 - When details view is displaying a goal:
     - **C**: Complete the goal.
     - **D**: Delete the goal.
     - **E**: Edit the goal.
+    - **H**: Show a heatmap of the daily completions of the goal.
     - **ESC**: Return to the list view.
 
 ### List View Details
 
+The **recent** column is a sparkline of the number of completions in each of the goal's last 8 periods, the oldest on the left and the current period on the right. A full block means that the target was reached in that period.
+
 When a goal is completed for the first time, GoalMate records the user provided datetime of the completion as the *last* completion datetime. Thereafter, when a goal is completed, GoalMate first prompts for the datetime the goal was actually completed and then prompts for the datetime that the goal actually needed to be completed. Normally these would be the same and, if this is the case, the user can simply press Enter to accept the completion datetime as the value for the needed datetime as well. 
 
 But the completion and needed datetimes are not necessarily the same. If, for example, the goal is to fill the bird feeders when they are empty, then the completion datetime would be when the feeders are filled, but the needed datetime would be when the feeders became empty. Suppose I noticed that the feeders were empty yesterday at 3pm, but I didn't get around to filling them until 10am today. Then I would enter 10am today as the completion datetime in response to the first prompt and 3pm yesterday in response to the second prompt. Alternatively, if I'm going to be away for a while and won't be able to fill the bird feeders while I'm gone and they are currently half full, then I might fill them now in the hope that they will not be emptied before I return. In this case I would use the current moment as the *completion* datetime. But what about the *needed* datetime? Entering a needed datetime would require me to estimate when the feeders would have become empty. While I could do this, I could also just enter "none". Here's how the different responses would be processed by GoalMate:
@@ -325,7 +336,7 @@ class DetailsScreen(Screen):
         self.lines = details[1:]
         self.footer = [
             "",
-            "[bold yellow]L[/bold yellow] list view, [bold yellow]C[/bold yellow] complete, [bold yellow]D[/bold yellow] delete, [bold yellow]E[/bold yellow] edit",
+            "[bold yellow]L[/bold yellow] list view, [bold yellow]C[/bold yellow] complete, [bold yellow]D[/bold yellow] delete, [bold yellow]E[/bold yellow] edit, [bold yellow]H[/bold yellow] heatmap",
         ]
 
     def compose(self) -> ComposeResult:
@@ -369,7 +380,9 @@ class ScrollableList(ScrollView):
         # Extract the title and remaining lines
         # self.title = Text.from_markup(title) if title else Text("Untitled")
         width = shutil.get_terminal_size().columns - 3
-        self.lines = [Text.from_markup(line) for line in lines]  # Exclude the title
+        # markup is parsed when a line is first rendered, not for the whole list
+        self.lines = lines
+        self.texts = {}
         self.virtual_size = Size(
             width, len(self.lines)
         )  # Adjust virtual size for lines
@@ -387,7 +400,9 @@ class ScrollableList(ScrollView):
             return Strip.blank(self.size.width)
 
         # Get the Rich Text object for the current line
-        line_text = self.lines[y].copy()  # Create a copy to apply styles dynamically
+        if y not in self.texts:
+            self.texts[y] = Text.from_markup(self.lines[y])
+        line_text = self.texts[y].copy()  # Create a copy to apply styles dynamically
 
         # Highlight the line if it matches the search term
         # if self.search_term and y in self.matches:
@@ -406,6 +421,70 @@ class ScrollableList(ScrollView):
         )
 
 
+class Heatmap(Widget):
+    """A calendar of daily completions, one column per week."""
+
+    def __init__(self, months: list, levels: list, **kwargs) -> None:
+        super().__init__(**kwargs)
+        # every line is built once here; render_line only looks them up
+        self.strips = self.build_strips(months, levels)
+
+    @staticmethod
+    def build_strips(months: list, levels: list) -> list[Strip]:
+        label_style = Style(color="#fff8dc", dim=True)
+        cell_styles = [Style(color=color) for color in HEATMAP_COLORS]
+        blank = " " * len(HEATMAP_CELL)
+
+        month_line = [" "] * (4 + len(HEATMAP_CELL) * len(months) + 3)
+        for week, month in enumerate(months):
+            pos = 4 + len(HEATMAP_CELL) * week
+            if month and month_line[pos - 1] == " ":
+                month_line[pos : pos + len(month)] = month
+        strips = [Strip([Segment("".join(month_line).rstrip(), label_style)])]
+
+        for weekday, row in enumerate(levels):
+            segments = [Segment(f"{WEEKDAY_LABELS[weekday]:<4}", label_style)]
+            for level in row:
+                if level is None:
+                    segments.append(Segment(blank))
+                else:
+                    segments.append(Segment(HEATMAP_CELL, cell_styles[level]))
+            strips.append(Strip(Segment.simplify(segments)))
+
+        legend = [Segment(f"{'':<4}Less ", label_style)]
+        legend.extend(Segment(HEATMAP_CELL, style) for style in cell_styles)
+        legend.append(Segment("More", label_style))
+        strips.extend([Strip.blank(0), Strip(legend)])
+        return strips
+
+    def get_content_height(self, container, viewport, width: int) -> int:
+        return len(self.strips)
+
+    def render_line(self, y: int) -> Strip:
+        if y >= len(self.strips):
+            return Strip.blank(self.size.width)
+        return self.strips[y].crop_extend(0, self.size.width, None)
+
+
+class HeatmapScreen(Screen):
+    """A full-screen heatmap of daily completions."""
+
+    def __init__(self, title: str, months: list, levels: list):
+        super().__init__()
+        self.heatmap_title = title
+        self.months = months
+        self.levels = levels
+
+    def compose(self) -> ComposeResult:
+        yield Static(self.heatmap_title, id="scroll_title", expand=True)
+        yield Static(Rule("", style="#fff8dc"), id="separator")
+        yield Heatmap(self.months, self.levels, id="heatmap")
+        yield Static(
+            "[bold yellow]ESC[/bold yellow] return to previous display",
+            id="custom_footer",
+        )
+
+
 class FullScreenList(Screen):
     """Reusable full-screen list for Last, Next, and Find views."""
 
@@ -554,6 +633,15 @@ class TextualView(App):
         self.view = "list"  # Track that we're in the list view
         self.push_screen(FullScreenList(details))
 
+    def action_show_heatmap(self, goal_id: int | None = None):
+        """Show a heatmap of the daily completions of goal_id or of all goals."""
+        # two columns per week after the 4 column weekday labels
+        weeks = max(1, min(53, (self.app.size.width - 6) // len(HEATMAP_CELL)))
+        title, months, levels, total = self.controller.heatmap(goal_id, weeks)
+        self.heatmap_return = self.view
+        self.view = "heatmap"
+        self.push_screen(HeatmapScreen(title, months, levels))
+
     def action_show_help(self):
         """Show the help screen."""
         self.view = "help"
@@ -700,6 +788,8 @@ class TextualView(App):
                 self.action_add_goal()
             elif event.key == "L":
                 self.action_show_list()
+            elif event.key == "H":
+                self.action_show_heatmap()
             elif event.key == "Q":
                 self.action_quit()
             elif event.key == "?":
@@ -714,6 +804,8 @@ class TextualView(App):
                 self.action_remove_goal()
             elif event.key == "E":
                 self.action_update_goal()
+            elif event.key == "H":
+                self.action_show_heatmap(self.selected_goal)
 
             # Step 1: Select a completion tag (lowercase letter)
             elif event.key and event.key in self.completion_tag_to_idx:
@@ -733,6 +825,13 @@ class TextualView(App):
                     self.action_remove_completion(self.selected_tag)
                 self.selected_tag = None  # Reset after action
 
+        elif self.view == "heatmap":
+            if event.key == "escape":
+                self.pop_screen()
+                self.view = self.heatmap_return
+            elif event.key == "L":
+                self.action_show_list()
+
         elif self.view == "help":
             if event.key in ["escape", "L"]:
                 self.action_show_list()
@@ -44,6 +44,9 @@ setup(
         'lorem>=0.1.1',
         'pyperclip>=1.7.0',
     ],
+    extras_require={
+        'zeo': ['ZEO>=5.2'],  # for a TRFSTORAGE zeo:// URI
+    },
     entry_points={
         'console_scripts': [
             'trf=trf.__main__:main',  # Correct the path to `main` in `trf/trf.py`
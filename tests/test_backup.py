@@ -0,0 +1,98 @@
+"""
+The daily backup and pack of trf.fs, run on a FileStorage over simulated
+days with a clock that ZODB and modules.backup both read.
+"""
+
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+import transaction
+import ZODB
+import ZODB.FileStorage
+
+from modules import backup
+
+DAY = 24 * 60 * 60
+PACK_DAYS = 7
+
+logger = logging.getLogger(__name__)
+
+
+class Clock:
+    def __init__(self):
+        self.now = time.time()
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+
+    class SimulatedDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.fromtimestamp(clock.now, tz)
+
+    monkeypatch.setattr(time, 'time', clock.time)
+    monkeypatch.setattr(backup, 'datetime', SimulatedDatetime)
+    return clock
+
+
+def restored_date(backup_dir, entries, target):
+    """Reassemble trf.fs up to the last of entries and return its root['date']."""
+    backup.reassemble(backup_dir, entries, target)
+    db = ZODB.DB(ZODB.FileStorage.FileStorage(target, read_only=True))
+    try:
+        return db.open().root()['date']
+    finally:
+        db.close()
+
+
+def test_daily_backup_and_pack_keep_incremental_restore_points(tmp_path, clock):
+    home = str(tmp_path)
+    storage = ZODB.FileStorage.FileStorage(os.path.join(home, 'trf.fs'))
+    db = ZODB.DB(storage)
+    root = db.open().root()
+    packs = 0
+    for _ in range(90):
+        clock.now += DAY
+        # the root record is rewritten every day, so every pack drops something
+        root['date'] = backup.datetime.now().strftime('%Y-%m-%d')
+        transaction.commit()
+        # as schedule_maintenance queues them
+        backup.rotate_backups(home, logger, storage.getSize())
+        ok, msg = backup.pack_backed_up(db, home, PACK_DAYS, logger)
+        assert ok, msg
+        packs += msg.startswith('Packed')
+    db.close()
+
+    backup_dir = os.path.join(home, 'backup')
+    entries = backup.load_chain(backup_dir)
+    assert sorted(os.listdir(backup_dir)) == sorted(
+        [backup.CHAIN_FILE] + [entry['file'] for entry in entries]
+    )
+    # packed about once a chain, and most backups are incremental
+    assert 90 // (PACK_DAYS + 2) <= packs <= 90 // PACK_DAYS
+    full = [entry for entry in entries if entry['kind'] == 'full']
+    assert len(full) <= len(entries) // PACK_DAYS + 1
+
+    # a restore point for each of the last KEEP_DAYS days and an older one
+    now = backup.datetime.now()
+    dates = {entry['created'][:10] for entry in entries}
+    for days in range(backup.KEEP_DAYS + 1):
+        assert (now - timedelta(days=days)).strftime('%Y-%m-%d') in dates
+    oldest = datetime.strptime(entries[0]['created'], backup.TIME_FORMAT)
+    assert oldest <= now - timedelta(days=backup.KEEP_DAYS)
+    assert oldest > now - timedelta(days=backup.KEEP_DAYS + 2 * (PACK_DAYS + 2))
+
+    # the oldest and the newest restore points reassemble to their day
+    chains = backup.split_chains(entries)
+    target = os.path.join(home, 'restored.fs')
+    assert restored_date(backup_dir, chains[0][:1], target) == entries[0]['created'][:10]
+    os.remove(target)
+    assert restored_date(backup_dir, chains[-1], target) == entries[-1]['created'][:10]
@@ -0,0 +1,193 @@
+"""
+Several trf clients on one storage. Each client is a TrackerManager with a
+connection and transaction manager of its own, as ZEO clients would have,
+on a FileStorage shared by threads.
+"""
+
+import logging
+import random
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+import transaction
+import ZODB
+import ZODB.FileStorage
+
+from modules import trf
+
+START = datetime(2024, 1, 1)
+WRITERS = 4
+ROUNDS = 40
+TRACKERS = 3
+ADD_EVERY = 5
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = ZODB.DB(ZODB.FileStorage.FileStorage(str(tmp_path / 'trf.fs')))
+    yield db
+    db.close()
+
+
+def client(db) -> trf.TrackerManager:
+    manager = transaction.TransactionManager()
+    connection = db.open(transaction_manager=manager)
+    return trf.TrackerManager(db.storage, db, connection, connection.root(), manager)
+
+
+def doc_ids(trackers) -> list:
+    return sorted(tracker.doc_id for tracker in trackers)
+
+
+def full_history(tracker) -> list:
+    archived = list(tracker.archive.keys()) if tracker.archive is not None else []
+    return sorted(archived + [dt for dt, _ in tracker.history])
+
+
+def test_sync_shows_the_changes_of_another_client(db, monkeypatch):
+    a, b = client(db), client(db)
+    monkeypatch.setattr(trf, 'tracker_manager', a)
+    added = [a.add_tracker(f"tracker {i}") for i in range(3)]
+    assert b.get_sorted_trackers() == []
+    assert b.sync()
+    assert doc_ids(b.get_sorted_trackers()) == added
+
+    a.delete_tracker(added[0])
+    assert a.change_tracker(added[1], 'record_completion', (START, timedelta(0)))[0]
+    assert b.sync()
+    assert doc_ids(b.get_sorted_trackers()) == added[1:]
+    assert b.trackers[added[1]].info['num_completions'] == 1
+    assert not b.sync()
+
+    # a client's own commits are not taken for another's
+    assert b.add_tracker("from b") is not None
+    assert not b.sync()
+    assert a.sync()
+
+    # indexes that went stale without a sync skip the deleted trackers
+    a.delete_tracker(added[1])
+    b.transaction.begin()
+    assert added[1] not in doc_ids(b.get_sorted_trackers())
+    assert added[1] not in doc_ids(b.due_between(datetime.min, datetime.max))
+    ok, msg = b.change_tracker(added[1], 'record_completion', (START, timedelta(0)))
+    assert not ok
+
+
+def test_a_conflicting_batch_is_run_again_or_raises(db, monkeypatch):
+    from ZODB.POSException import ConflictError
+
+    a, b = client(db), client(db)
+    monkeypatch.setattr(trf, 'tracker_manager', a)
+    runs = []
+
+    def add():
+        runs.append(a.add_tracker("from a"))
+        if len(runs) == 1:
+            # commits next_id before a can
+            b.add_tracker("from b")
+
+    assert a.save_batch(add)
+    assert len(runs) == 2
+    assert sorted(tracker.name for tracker in client(db).trackers.values()) == [
+        "from a", "from b"
+    ]
+
+    a.sync()
+    with pytest.raises(ConflictError):
+        with a.batch():
+            a.add_tracker("lost")
+            b.add_tracker("kept")
+    assert sorted(tracker.name for tracker in client(db).trackers.values()) == [
+        "from a", "from b", "kept"
+    ]
+
+
+def test_a_merged_history_is_truncated_and_saved(db, monkeypatch):
+    a, b = client(db), client(db)
+    monkeypatch.setattr(trf, 'tracker_manager', a)
+    completions = [(START + timedelta(days=i), timedelta(0)) for i in range(4)]
+    a.settings['max_history'] = 1
+    doc_id = a.add_tracker("shared")
+    for completion in completions[:2]:
+        a.change_tracker(doc_id, 'record_completion', completion)
+    a.settings['max_history'] = 2
+    assert b.sync()
+    assert full_history(b.trackers[doc_id]) == [dt for dt, _ in completions[:2]]
+
+    # merged, the history is one more than max_history and b archives the
+    # oldest completion
+    assert a.change_tracker(doc_id, 'record_completion', completions[2])[0]
+    assert b.change_tracker(doc_id, 'record_completion', completions[3])[0]
+    tracker = client(db).trackers[doc_id]
+    assert tracker.history == completions[2:]
+    assert full_history(tracker) == [dt for dt, _ in completions]
+
+
+def write(manager, writer, recorded, added, errors):
+    rng = random.Random(writer)
+    try:
+        for i in range(ROUNDS):
+            doc_id = rng.randint(1, TRACKERS)
+            # unique to the writer and round, so every completion is kept
+            dt = START + timedelta(minutes=ROUNDS * writer + i)
+            ok, msg = manager.change_tracker(doc_id, 'record_completion', (dt, timedelta(0)))
+            assert ok, msg
+            recorded.setdefault(doc_id, set()).add(dt)
+            if i % ADD_EVERY == 0:
+                doc_id = manager.add_tracker(f"writer {writer} round {i}")
+                assert doc_id is not None
+                added.append(doc_id)
+    except BaseException as e:
+        errors.append(e)
+
+
+# with the smaller max_history merged histories outgrow it and are archived
+@pytest.mark.parametrize('max_history', [WRITERS * ROUNDS, ROUNDS // 8])
+def test_concurrent_writers_lose_nothing(db, monkeypatch, caplog, max_history):
+    caplog.set_level(logging.INFO)
+    resolved = []
+    resolve = trf.Tracker._p_resolveConflict
+
+    def counted(self, *states):
+        resolved.append(self)
+        return resolve(self, *states)
+
+    monkeypatch.setattr(trf.Tracker, '_p_resolveConflict', counted)
+    first = client(db)
+    monkeypatch.setattr(trf, 'tracker_manager', first)
+    # Tracker.history_limit reads the settings of trf.tracker_manager
+    first.settings['max_history'] = max_history
+    for i in range(TRACKERS):
+        first.add_tracker(f"shared {i}")
+
+    recorded = [{} for _ in range(WRITERS)]
+    added = [[] for _ in range(WRITERS)]
+    errors = []
+    threads = [
+        threading.Thread(
+            target=write, args=(client(db), writer, recorded[writer], added[writer], errors)
+        )
+        for writer in range(WRITERS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+    check = client(db)
+    # every tracker added once, with next_id after the last of them
+    ids = [doc_id for ids in added for doc_id in ids]
+    assert len(ids) == len(set(ids)) == WRITERS * ((ROUNDS - 1) // ADD_EVERY + 1)
+    assert list(check.trackers.keys()) == list(range(1, TRACKERS + len(ids) + 1))
+    assert check.root['next_id'] == TRACKERS + len(ids) + 1
+    # every completion kept once, whether merged by _p_resolveConflict or
+    # retried, and archived or not
+    for doc_id in range(1, TRACKERS + 1):
+        expected = set().union(*(writer.get(doc_id, set()) for writer in recorded))
+        assert full_history(check.trackers[doc_id]) == sorted(expected)
+    assert check.root['changes']() == check.changes_seen
+    # both the merge and the retry were needed
+    assert resolved
+    assert any('conflicted, retrying' in record.message for record in caplog.records)
@@ -0,0 +1,44 @@
+"""
+The cost of importing modules.trf, which builds no UI and opens no database
+until main() runs, measured with -X importtime in a fresh interpreter.
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the import took about 370 ms when the UI and the database were set up on
+# import and takes 160-250 ms without them, the best of RUNS is compared
+BUDGET_MS = int(os.environ.get('TRF_IMPORT_BUDGET_MS', 300))
+RUNS = 3
+# imported only when the database is opened or the examples or clipboard used
+LAZY = ('ZODB', 'BTrees', 'transaction', 'ZEO', 'lorem', 'pyperclip')
+
+
+def python(*args) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+
+def import_time_us() -> int:
+    """The cumulative microseconds reported for modules.trf."""
+    stderr = python('-X', 'importtime', '-c', 'import modules.trf').stderr
+    match = re.search(r'^import time:\s+\d+ \|\s+(\d+) \| modules\.trf$', stderr, re.M)
+    assert match, stderr
+    return int(match.group(1))
+
+
+def test_import_time_budget():
+    best = min(import_time_us() for _ in range(RUNS))
+    assert best <= BUDGET_MS * 1000, f"import modules.trf took {best / 1000:.0f} ms"
+
+
+def test_import_leaves_lazy_modules_unloaded():
+    code = (
+        "import sys, modules.trf\n"
+        f"print(' '.join(sorted(m for m in sys.modules if m.split('.')[0] in {LAZY!r})))"
+    )
+    assert python('-c', code).stdout.split() == []
@@ -0,0 +1,133 @@
+"""
+Several trf processes sharing a ZEO server through TRFSTORAGE, as a second
+trf or a cron script would. Tracker conflicts are resolved by the server,
+which imports modules.trf for _p_resolveConflict, and the rest are retried
+by TrackerManager.save_data. Skipped when ZEO is not installed.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('ZEO')
+
+from modules import trf  # noqa: E402
+from modules.storage import StorageSpec  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+START = datetime(2024, 1, 1)
+WRITERS = 4
+ROUNDS = 30
+TRACKERS = 3
+ADD_EVERY = 5
+# smaller than the completions of each tracker, so that some are archived
+MAX_HISTORY = 5
+TIMEOUT = 120
+
+# run in each writer process with the writer's number, the start time as a
+# timestamp and the path whose existence starts every writer at once
+WRITER = f"""
+import json, os, random, sys, time
+from datetime import datetime, timedelta
+from modules import trf
+from modules.storage import StorageSpec
+
+writer, start, gate = int(sys.argv[1]), float(sys.argv[2]), sys.argv[3]
+start = datetime.fromtimestamp(start)
+spec = StorageSpec(os.environ['TRFSTORAGE'], None)
+trf.tracker_manager = manager = trf.TrackerManager(*trf.init_db(None, spec))
+rng = random.Random(writer)
+recorded, added = {{}}, []
+while not os.path.exists(gate):
+    time.sleep(0.01)
+for i in range({ROUNDS}):
+    doc_id = rng.randint(1, {TRACKERS})
+    dt = start + timedelta(minutes={ROUNDS} * writer + i)
+    ok, msg = manager.change_tracker(doc_id, 'record_completion', (dt, timedelta(0)))
+    assert ok, msg
+    recorded.setdefault(doc_id, []).append(dt.timestamp())
+    if i % {ADD_EVERY} == 0:
+        doc_id = manager.add_tracker(f"writer {{writer}} round {{i}}")
+        assert doc_id is not None
+        added.append(doc_id)
+manager.close()
+print(json.dumps(dict(recorded=recorded, added=added)))
+"""
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Start runzeo on a unix socket in tmp_path and return its TRFSTORAGE URI."""
+    sock = str(tmp_path / 'zeo.sock')
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'ZEO.runzeo', '-a', sock, '-f', str(tmp_path / 'trf.fs')],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + TIMEOUT
+    while not os.path.exists(sock):
+        assert process.poll() is None, "runzeo exited"
+        assert time.monotonic() < deadline, "runzeo did not start"
+        time.sleep(0.05)
+    yield f"zeo://{sock}"
+    process.terminate()
+    process.wait(TIMEOUT)
+
+
+def full_history(tracker) -> list:
+    archived = list(tracker.archive.keys()) if tracker.archive is not None else []
+    return sorted(archived + [dt for dt, _ in tracker.history])
+
+
+def open_manager(uri, monkeypatch) -> trf.TrackerManager:
+    manager = trf.TrackerManager(*trf.init_db(None, StorageSpec(uri, None)))
+    monkeypatch.setattr(trf, 'tracker_manager', manager)
+    return manager
+
+
+def test_writer_processes_lose_nothing(server, tmp_path, monkeypatch):
+    first = open_manager(server, monkeypatch)
+    first.settings['max_history'] = MAX_HISTORY
+    first.root._p_changed = True
+    for i in range(TRACKERS):
+        first.add_tracker(f"shared {i}")
+    first.close()
+
+    gate = tmp_path / 'go'
+    env = dict(os.environ, PYTHONPATH=ROOT, TRFSTORAGE=server)
+    writers = [
+        subprocess.Popen(
+            [sys.executable, '-c', WRITER, str(writer), str(START.timestamp()), str(gate)],
+            cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+        )
+        for writer in range(WRITERS)
+    ]
+    gate.touch()
+    results = []
+    for process in writers:
+        stdout, stderr = process.communicate(timeout=TIMEOUT)
+        assert process.returncode == 0, stderr
+        results.append(json.loads(stdout.splitlines()[-1]))
+
+    check = open_manager(server, monkeypatch)
+    try:
+        # every tracker added once, with next_id after the last of them
+        ids = [doc_id for result in results for doc_id in result['added']]
+        assert len(ids) == len(set(ids)) == WRITERS * ((ROUNDS - 1) // ADD_EVERY + 1)
+        assert list(check.trackers.keys()) == list(range(1, TRACKERS + len(ids) + 1))
+        assert check.root['next_id'] == TRACKERS + len(ids) + 1
+        # every completion kept once, in the history or the archive
+        for doc_id in range(1, TRACKERS + 1):
+            expected = sorted(
+                datetime.fromtimestamp(ts)
+                for result in results
+                for ts in result['recorded'].get(str(doc_id), [])
+            )
+            assert full_history(check.trackers[doc_id]) == expected
+    finally:
+        check.close()